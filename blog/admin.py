@@ -3,7 +3,7 @@ from django.contrib import admin
 from .models import Blog, Comment
 
 class BlogAdmin(admin.ModelAdmin):
-    prepopulated_fields = {"slug": ("title",)}
+    readonly_fields = ('slug',)
 
 admin.site.register(Blog, BlogAdmin)
 admin.site.register(Comment)
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Read-only JSON API for posts, their comments and bloggers.
+
+Rows are read with ``.values()`` and serialized straight from the dicts,
+so no model instances are built. Lists page with the same keyset cursors
+as the HTML views, the bloggers list is streamed, and every response
+carries an ETag.
+"""
+import hashlib
+import json
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.http import HttpResponse, HttpResponsePermanentRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views import View
+
+from . import cache
+from .cache import AnonymousPageCacheMixin
+from .models import Blog, BlogSlugRedirect, Comment
+from .pagination import InvalidCursor, KeysetPaginator
+
+BLOG_FIELDS = ('id', 'slug', 'title', 'created_at', 'updated_at', 'comment_count', 'last_comment_at')
+COMMENT_FIELDS = ('id', 'content', 'content_html', 'created_at', 'updated_at')
+BLOGGER_FIELDS = ('id', 'username', 'bio')
+
+
+def _default(value):
+    # keep microseconds, DjangoJSONEncoder drops them
+    return value.isoformat()
+
+
+_encode = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False).encode
+
+
+def _nest(row, prefix, *fields):
+    """Move ``prefix__field`` keys of a values() row into a nested dict."""
+    row[prefix] = {field: row.pop(f'{prefix}__{field}') for field in fields}
+    return row
+
+
+class BadRequest(Exception):
+    pass
+
+
+class JsonView(View):
+    http_method_names = ['get', 'head', 'options']
+    content_type = 'application/json'
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+    def json_response(self, data):
+        """The serialized ``data``, tagged with a hash of itself."""
+        body = _encode(data).encode()
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type=self.content_type)
+        response['ETag'] = etag
+        return response
+
+    def page(self, queryset, ordering, cursor_kwarg='cursor', per_page=None):
+        paginator = KeysetPaginator(queryset, per_page or self.get_limit(), ordering)
+        try:
+            return paginator.page(self.request.GET.get(cursor_kwarg))
+        except InvalidCursor as e:
+            raise BadRequest(str(e))
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', self.default_limit))
+        except ValueError:
+            raise BadRequest('limit must be a number.')
+        return min(max(limit, 1), self.max_limit)
+
+    def page_link(self, cursor, cursor_kwarg='cursor'):
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query[cursor_kwarg] = cursor
+        return self.request.build_absolute_uri(f'{self.request.path}?{query.urlencode()}')
+
+
+class BlogListApiView(AnonymousPageCacheMixin, JsonView):
+    """Posts, newest first or by ``?sort=discussed|active``, ``?blogger=<pk>`` for one blogger's."""
+    cache_tags = ['blogs']
+    default_limit = 20
+    max_limit = 100
+    sort_orderings = {
+        'recent': ('-created_at', 'id'),
+        'discussed': ('-comment_count', '-created_at', 'id'),
+        'active': ('-last_comment_at', 'id'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        sort = request.GET.get('sort')
+        if sort not in self.sort_orderings:
+            sort = 'recent'
+        queryset = Blog.objects.values(*BLOG_FIELDS, 'blogger__id', 'blogger__username')
+        if sort == 'active':
+            queryset = queryset.filter(last_comment_at__isnull=False)
+        blogger = request.GET.get('blogger')
+        if blogger:
+            if not blogger.isdigit():
+                raise BadRequest('blogger must be a number.')
+            queryset = queryset.filter(blogger=blogger)
+
+        page = self.page(queryset, self.sort_orderings[sort])
+        return self.json_response({
+            'results': [_nest(row, 'blogger', 'id', 'username') for row in page],
+            'next': self.page_link(page.next_cursor),
+            'previous': self.page_link(page.previous_cursor),
+        })
+
+
+class BlogDetailApiView(AnonymousPageCacheMixin, JsonView):
+    """One post with a page of its comments, oldest first, ``?comments_after=`` for the next."""
+    comments_per_page = 50
+
+    def get_cache_tags(self):
+        return [f"blog:{self.kwargs['slug']}"]
+
+    def get(self, request, *args, **kwargs):
+        blog = (Blog.objects.filter(slug=kwargs['slug'])
+                .values(*BLOG_FIELDS, 'content', 'content_html', 'blogger__id', 'blogger__username').first())
+        if blog is None:
+            # the post may have been renamed, send clients to its current slug
+            redirect = get_object_or_404(BlogSlugRedirect.objects.select_related('blog'), old_slug=kwargs['slug'])
+            return HttpResponsePermanentRedirect(reverse('blog:api_blog', kwargs={'slug': redirect.blog.slug}))
+
+        comments = Comment.objects.filter(blog=blog['id']).values(*COMMENT_FIELDS, 'user__id', 'user__username')
+        page = self.page(comments, ('created_at', 'id'), 'comments_after', self.comments_per_page)
+        blog['comments'] = {
+            'results': [_nest(row, 'user', 'id', 'username') for row in page],
+            'next': self.page_link(page.next_cursor, 'comments_after'),
+        }
+        return self.json_response(_nest(blog, 'blogger', 'id', 'username'))
+
+
+class BloggerListApiView(JsonView):
+    """Every blogger, streamed."""
+    chunk_size = 500
+
+    def get(self, request, *args, **kwargs):
+        queryset = get_user_model().objects.bloggers().order_by('username').values(*BLOGGER_FIELDS)
+        # rows are read after the view returns, keep them on the database chosen now
+        queryset = queryset.using(queryset.db)
+
+        # the list is only read while streaming, so tag it by what could change it
+        stats = queryset.aggregate(count=Count('id'), last=Max('id'))
+        version = cache.tag_versions(['bloggers'])[0]
+        etag = quote_etag(hashlib.md5(repr([stats['count'], stats['last'], version]).encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = StreamingHttpResponse(self.stream(queryset), content_type=self.content_type)
+        response['ETag'] = etag
+        return response
+
+    def stream(self, queryset):
+        yield b'{"results":['
+        separator = ''
+        chunk = []
+        for row in queryset.iterator(chunk_size=self.chunk_size):
+            chunk.append(_encode(row))
+            if len(chunk) == self.chunk_size:
+                yield (separator + ','.join(chunk)).encode()
+                separator, chunk = ',', []
+        if chunk:
+            yield (separator + ','.join(chunk)).encode()
+        yield b']}'
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # the project's own checks, diy_blog is not an app
+        from diy_blog import checks  # noqa: F401
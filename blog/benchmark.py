@@ -0,0 +1,279 @@
+"""
+Benchmark data and load driver for the blog.
+
+``seed`` fills the database with generated bloggers, readers, posts and
+comments through the bulk importer of blog.transfer. ``run`` drives the
+key views, through the test client or against a running server, at a
+given concurrency and measures throughput, latency percentiles and
+queries per request. Results can be saved as a baseline and compared
+with later runs.
+"""
+import copy
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import ExitStack
+from datetime import timedelta
+from statistics import mean, quantiles
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from diy_blog.profiling import Profile
+
+from .models import Blog
+from .transfer import Importer, preserve_timestamps
+
+PREFIX = 'bench'
+WORDS = (
+    'glue clamp sand stain varnish drill dowel plank joint chisel router jig hinge shelf cabinet '
+    'paint primer brush roller tile grout caulk level stud drywall anchor screw nail saw blade '
+    'garden planter trellis compost raised bed hose valve pipe faucet sink drain wire switch '
+    'outlet lamp fixture bulb solder circuit bench table chair stool frame mirror door latch'
+).split()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize() + '.'
+
+
+def dataset(bloggers=2000, readers=8000, posts=100000, comments=2000000, seed=0):
+    """
+    Yield the records of a generated site in the format of blog.transfer.
+    A few bloggers write most of the posts and a few posts draw most of
+    the comments, as on a real site.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    start = now - timedelta(days=3 * 365)
+    span = (now - start).total_seconds()
+
+    users = [f'{PREFIX}-blogger-{n}' for n in range(bloggers)] + [f'{PREFIX}-reader-{n}' for n in range(readers)]
+    for n, username in enumerate(users):
+        yield {
+            'type': 'user', 'username': username, 'email': f'{username}@example.com',
+            'first_name': '', 'last_name': '', 'bio': _text(rng, 12) if n < bloggers else None,
+            'is_blogger': n < bloggers, 'date_joined': start.isoformat(),
+        }
+
+    # Pareto weights give the long tail
+    blogger_weights = [rng.paretovariate(1.2) for _ in range(bloggers)]
+    post_weights = [rng.paretovariate(1.2) for _ in range(posts)]
+    total_weight = sum(post_weights)
+    created = sorted(start + timedelta(seconds=rng.random() * span) for _ in range(posts))
+    authors = rng.choices(users[:bloggers], weights=blogger_weights, k=posts)
+    for n in range(posts):
+        yield {
+            'type': 'blog', 'slug': f'{PREFIX}-post-{n}', 'title': _text(rng, 5)[:64],
+            'content': '\n\n'.join(_text(rng, 60) for _ in range(rng.randint(2, 8))),
+            'created_at': created[n].isoformat(), 'updated_at': created[n].isoformat(),
+            'blogger': authors[n],
+        }
+
+    # comments come post by post so each import batch recounts few posts
+    remaining = comments
+    for n in range(posts):
+        if remaining <= 0:
+            break
+        share = min(remaining, round(comments * post_weights[n] / total_weight)) if n < posts - 1 else remaining
+        remaining -= share
+        seconds = (now - created[n]).total_seconds()
+        times = sorted(created[n] + timedelta(seconds=rng.random() * seconds) for _ in range(share))
+        for commented in times:
+            yield {
+                'type': 'comment', 'blog': f'{PREFIX}-post-{n}', 'user': rng.choice(users),
+                'content': _text(rng, rng.randint(5, 60)),
+                'created_at': commented.isoformat(), 'updated_at': commented.isoformat(),
+            }
+
+
+def seed(batch_size=1000, report=None, **sizes):
+    """Insert a generated dataset, skipping the records that are already there."""
+    importer = Importer(batch_size, report)
+    with preserve_timestamps():
+        for record in dataset(**sizes):
+            importer.add(record)
+        importer.flush()
+    return importer
+
+
+class Scenario:
+    def __init__(self, name, paths, user=None):
+        self.name = name
+        self.paths = paths
+        # username to log in as, None for an anonymous reader
+        self.user = user
+
+
+def scenarios(samples=50, seed=0):
+    """The views to drive, each with ``samples`` URLs spread over the data."""
+    rng = random.Random(seed)
+    # the same posts on every run, so runs can be compared
+    posts = Blog.objects.order_by('pk').values_list('slug', 'blogger', 'blogger__username')
+    total = posts.count()
+    blogs = [posts[offset] for offset in sorted(rng.sample(range(total), min(samples, total)))]
+    if not blogs:
+        raise ValueError('There are no posts to benchmark, run seed_benchmark first.')
+    query = ' '.join(rng.sample(WORDS, 2))
+    return [
+        Scenario('pages:home', [reverse('pages:home')]),
+        Scenario('blog:blog', [reverse('blog:blog'), reverse('blog:blog') + '?sort=discussed']),
+        Scenario('blog:detail', [reverse('blog:detail', kwargs={'slug': slug}) for slug, _, _ in blogs]),
+        Scenario('blog:bloggers', [reverse('blog:bloggers')]),
+        Scenario('blog:blogger', [reverse('blog:blogger', kwargs={'pk': pk}) for _, pk, _ in blogs]),
+        Scenario('blog:feed', [reverse('blog:feed', kwargs={'feed_format': 'rss'})]),
+        Scenario('blog:search', [reverse('blog:search') + f'?q={word}' for word in query.split()]),
+        Scenario('dashboard:index', [reverse('dashboard:index')], user=blogs[0][2]),
+        Scenario('blog:api_blogs', [reverse('blog:api_blogs'), reverse('blog:api_blogs') + '?sort=discussed']),
+        Scenario('blog:api_blog', [reverse('blog:api_blog', kwargs={'slug': slug}) for slug, _, _ in blogs]),
+        Scenario('blog:api_bloggers', [reverse('blog:api_bloggers')]),
+    ]
+
+
+class Result:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.seconds = 0
+
+    def summary(self):
+        latencies = sorted(self.latencies) or [0]
+        cuts = quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'rps': len(self.latencies) / self.seconds if self.seconds else 0,
+            'p50_ms': cuts[49] * 1000,
+            'p95_ms': cuts[94] * 1000,
+            'p99_ms': cuts[98] * 1000,
+            # None when driving a server, whose queries cannot be seen from here
+            'queries': mean(self.queries) if self.queries else None,
+        }
+
+
+class ClientDriver:
+    """Requests through Django's test client, in this process, counting queries."""
+
+    def __init__(self, host):
+        self.host = host
+        self.cookies = {}
+        self.lock = threading.Lock()
+
+    def session(self, scenario):
+        client = Client(HTTP_HOST=self.host)
+        if scenario.user:
+            # one login shared by every worker, like one user with several tabs
+            with self.lock:
+                if scenario.user not in self.cookies:
+                    client.force_login(get_user_model().objects.get(username=scenario.user))
+                    self.cookies[scenario.user] = client.cookies
+            client.cookies = copy.copy(self.cookies[scenario.user])
+        return client
+
+    def get(self, client, path, result):
+        profile = Profile()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(profile))
+            response = client.get(path)
+            # streaming responses run their queries while being read
+            b''.join(response) if response.streaming else response.content
+        result.queries.append(profile.queries)
+        return response.status_code
+
+    def close(self):
+        # the test client keeps its thread's connections open
+        connections.close_all()
+
+
+class ServerDriver:
+    """Requests to a running server; views needing a login are skipped."""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def session(self, scenario):
+        return None
+
+    def get(self, client, path, result):
+        try:
+            with urllib.request.urlopen(self.url + path) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def close(self):
+        pass
+
+
+def run(scenario, driver, requests=200, concurrency=4):
+    result = Result(scenario.name)
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = driver.session(scenario)
+        try:
+            while True:
+                with lock:
+                    n = next(counter, None)
+                if n is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    status = driver.get(client, scenario.paths[n % len(scenario.paths)], result)
+                except Exception:
+                    # count it, a dead worker would quietly shrink the run
+                    status = 500
+                elapsed = time.perf_counter() - started
+                with lock:
+                    result.latencies.append(elapsed)
+                    result.errors += status >= 400
+        finally:
+            driver.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save_baseline(path, summaries):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(summaries, handle, indent=2, sort_keys=True)
+
+
+def regressions(summaries, baseline, tolerance=0.3):
+    """Describe every view that got slower or ran more queries than the baseline allows."""
+    found = []
+    for name, summary in summaries.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before['rps'] and summary['rps'] < before['rps'] * (1 - tolerance):
+            found.append(f"{name}: {summary['rps']:.1f} requests/s, baseline {before['rps']:.1f}")
+        # p99 of a few hundred requests is too noisy to compare
+        if before['p95_ms'] and summary['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append(f"{name}: p95 {summary['p95_ms']:.1f} ms, baseline {before['p95_ms']:.1f}")
+        # query counts hardly vary between runs, a whole query more per request is a regression
+        if None not in (summary['queries'], before['queries']) and summary['queries'] > before['queries'] + 0.5:
+            found.append(f"{name}: {summary['queries']:.1f} queries, baseline {before['queries']:.1f}")
+    return found
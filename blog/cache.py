@@ -0,0 +1,115 @@
+"""
+Full-page cache for anonymous readers.
+
+Every cached page is stored under a key built from its URL and the current
+version of each tag it depends on (``blogs``, ``blog:<slug>``,
+``blogger:<pk>``...). Purging a tag bumps its version, so only the pages
+that carry that tag miss on their next request. Only plain cache get/set/incr
+calls are used, which keeps it working on the locmem and file backends.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from diy_blog.routers import read_from_primary
+
+TAG_PREFIX = 'page-tag'
+PAGE_PREFIX = 'page'
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}:{tag}'
+
+
+def _new_version():
+    # never reuse a version if the tag key is evicted and created again
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def purge(*tags):
+    """Invalidate every cached page that carries one of ``tags``."""
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def page_cache_key(request, tags):
+    versions = '.'.join(str(version) for version in tag_versions(tags))
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{PAGE_PREFIX}:{url}:{hashlib.md5(versions.encode()).hexdigest()}'
+
+
+class AnonymousPageCacheMixin:
+    """
+    Serve whole responses from the cache to anonymous GET/HEAD requests.
+    Views list the tags their page depends on in ``get_cache_tags``.
+    """
+    cache_tags = []
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._can_use_cache(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, self.get_cache_tags())
+        response = cache.get(key)
+        if response is not None:
+            request.page_cache = 'hit'
+            return get_conditional_response(
+                request, etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+                response=response)
+
+        request.page_cache = 'miss'
+        # a stale page from a lagging replica would be served until the TTL,
+        # read the primary up to and including the rendering
+        read_from_primary()
+        response = super().dispatch(request, *args, **kwargs)
+
+        def store(response):
+            # a page holding a CSRF token is tied to this reader's cookie
+            if self._can_cache_response(response) and not request.META.get('CSRF_COOKIE_USED'):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+
+        if hasattr(response, 'render') and callable(response.render):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    def _can_use_cache(self, request):
+        return (
+            settings.PAGE_CACHE_TIMEOUT > 0
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+            # a pending flash message would be baked into the page
+            and not len(messages.get_messages(request))
+        )
+
+    def _can_cache_response(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
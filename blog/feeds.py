@@ -0,0 +1,177 @@
+"""
+RSS and Atom feeds of every post and of each blogger's posts.
+
+Entries are streamed straight from a chunked queryset iterator, and each
+entry's XML is cached under its post's id and ``updated_at``. A new or
+edited post therefore costs one render, and a feed of any length never
+sits in memory as a whole.
+"""
+import hashlib
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views import View
+
+from .models import Blog
+
+# v2 entries describe posts with their rendered content_html
+ENTRY_PREFIX = 'feed-entry-v2'
+# keys change with updated_at, so old entries simply age out
+ENTRY_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class StreamingFeedMixin:
+    """Split a feed generator's output into its head, entries and tail."""
+    encoding = 'utf-8'
+    updated = None
+
+    def latest_post_date(self):
+        return self.updated or super().latest_post_date()
+
+    def write_items(self, handler):
+        self._items_offset = self._buffer.tell()
+
+    def stream(self, entries):
+        self._buffer = io.StringIO()
+        self.write(self._buffer, self.encoding)
+        document = self._buffer.getvalue()
+        yield document[:self._items_offset]
+        yield from entries
+        yield document[self._items_offset:]
+
+    def render_item(self, **kwargs):
+        self.add_item(**kwargs)
+        item = self.items.pop()
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, self.encoding)
+        handler.startElement(self.item_element, self.item_attributes(item))
+        self.add_item_elements(handler, item)
+        handler.endElement(self.item_element)
+        return buffer.getvalue()
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    item_element = 'item'
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    item_element = 'entry'
+
+
+FEED_TYPES = {
+    'rss': RssFeed,
+    'atom': AtomFeed,
+}
+
+
+class BlogFeedView(View):
+    title = 'DIY Blog'
+    description = 'The latest posts from every blogger.'
+    chunk_size = 100
+
+    def get(self, request, *args, **kwargs):
+        feed_type = FEED_TYPES.get(kwargs['feed_format'])
+        if feed_type is None:
+            raise Http404('Unknown feed format.')
+        queryset = self.get_queryset()
+        # entries are read after the view returns, keep them on the database chosen now
+        queryset = queryset.using(queryset.db)
+
+        # one aggregate tells whether anything in the feed changed; only the
+        # ETag carries the count, deleting a post can move the newest date back
+        stats = queryset.aggregate(updated=Max('updated_at'), count=Count('id'))
+        etag = quote_etag(hashlib.md5(repr([
+            kwargs['feed_format'], request.get_full_path(), request.get_host(), stats['updated'], stats['count'],
+        ]).encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        feed = feed_type(
+            title=self.get_title(),
+            link=request.build_absolute_uri(self.get_link()),
+            description=self.description,
+            feed_url=request.build_absolute_uri(),
+        )
+        feed.updated = stats['updated']
+        response = StreamingHttpResponse(feed.stream(self.entries(feed, queryset)), content_type=feed.content_type)
+        response['ETag'] = etag
+        return response
+
+    def get_queryset(self):
+        return (Blog.objects.select_related('blogger')
+                .only('title', 'content_html', 'slug', 'created_at', 'updated_at', 'blogger__username'))
+
+    def get_title(self):
+        return self.title
+
+    def get_link(self):
+        return reverse('blog:blog')
+
+    def entries(self, feed, queryset):
+        """Yield each post's entry XML, rendering only what the cache misses."""
+        chunk = []
+        for blog in queryset.iterator(chunk_size=self.chunk_size):
+            chunk.append(blog)
+            if len(chunk) == self.chunk_size:
+                yield from self._render_chunk(feed, chunk)
+                chunk = []
+        yield from self._render_chunk(feed, chunk)
+
+    def _render_chunk(self, feed, blogs):
+        keys = {blog.pk: self._entry_key(feed, blog) for blog in blogs}
+        cached = cache.get_many(keys.values())
+        rendered = {}
+        for blog in blogs:
+            key = keys[blog.pk]
+            if key not in cached:
+                cached[key] = rendered[key] = self.render_entry(feed, blog)
+            yield cached[key]
+        if rendered:
+            cache.set_many(rendered, ENTRY_TIMEOUT)
+
+    def _entry_key(self, feed, blog):
+        # entries hold absolute links, so the host is part of the key
+        parts = [self.request.get_host(), blog.updated_at.isoformat(), blog.blogger.username]
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        return f'{ENTRY_PREFIX}:{feed.item_element}:{blog.pk}:{digest}'
+
+    def render_entry(self, feed, blog):
+        link = self.request.build_absolute_uri(blog.get_absolute_url())
+        return feed.render_item(
+            title=blog.title,
+            link=link,
+            description=blog.content_html,
+            author_name=blog.blogger.username,
+            pubdate=blog.created_at,
+            updateddate=blog.updated_at,
+            unique_id=link,
+        )
+
+
+class BloggerFeedView(BlogFeedView):
+    def get(self, request, *args, **kwargs):
+        self.blogger = get_object_or_404(get_user_model().objects.bloggers().only('username'), pk=kwargs['pk'])
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(blogger=self.blogger)
+
+    def get_title(self):
+        return f'{self.title}: {self.blogger.username}'
+
+    def get_link(self):
+        return reverse('blog:blogger', kwargs={'pk': self.blogger.pk})
+
+    @property
+    def description(self):
+        return f'The latest posts from {self.blogger.username}.'
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from blog import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the key views at a given concurrency and report requests/s, latency '
+        'percentiles and queries per request. Run seed_benchmark first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per view.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--view', action='append', dest='views', help='Only these URL names, repeatable.')
+        parser.add_argument('--server', help='URL of a running server, instead of the test client.')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Serve anonymous readers from the full-page cache, off by default to time the views.')
+        parser.add_argument('--host', default='127.0.0.1', help='Host header for the test client.')
+        parser.add_argument('--save-baseline', metavar='PATH')
+        parser.add_argument('--baseline', metavar='PATH', help='Fail when a view regressed against this file.')
+        parser.add_argument('--tolerance', type=float, default=0.3,
+                            help='Share of throughput or p95 a view may lose before it counts as regressed.')
+
+    def handle(self, *args, **options):
+        if options['page_cache'] or options['server']:
+            return self.benchmark(options)
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            return self.benchmark(options)
+
+    def benchmark(self, options):
+        try:
+            scenarios = benchmark.scenarios()
+        except ValueError as error:
+            raise CommandError(error)
+        if options['views']:
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['views']]
+        if options['server']:
+            driver = benchmark.ServerDriver(options['server'])
+            scenarios = [scenario for scenario in scenarios if scenario.user is None]
+        else:
+            driver = benchmark.ClientDriver(options['host'])
+
+        self.stdout.write(f"{'view':<18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+        summaries = {}
+        for scenario in scenarios:
+            summary = summaries[scenario.name] = benchmark.run(
+                scenario, driver, options['requests'], options['concurrency']).summary()
+            queries = '-' if summary['queries'] is None else f"{summary['queries']:.1f}"
+            self.stdout.write(
+                f"{scenario.name:<18}{summary['rps']:>9.1f}{summary['p50_ms']:>9.1f}{summary['p95_ms']:>9.1f}"
+                f"{summary['p99_ms']:>9.1f}{queries:>9}{summary['errors']:>8}")
+
+        if options['save_baseline']:
+            benchmark.save_baseline(options['save_baseline'], summaries)
+            self.stdout.write(f"Saved the baseline to {options['save_baseline']}.")
+        if options['baseline']:
+            found = benchmark.regressions(summaries, benchmark.load_baseline(options['baseline']), options['tolerance'])
+            if found:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(found))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
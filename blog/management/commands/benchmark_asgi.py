@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from statistics import quantiles
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from diy_blog.handlers import AsgiHandler
+
+
+def _summary(latencies, elapsed):
+    p99 = quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    return len(latencies) / elapsed, p99 * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the same page through the WSGI and the ASGI entry points in-process, '
+        'with every client taking --client-delay seconds to read the response, and '
+        'compare requests per second and p99 latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/blog/blogs/')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--client-delay', type=float, default=0.05)
+        parser.add_argument('--threads', type=int, default=settings.ASGI_THREADS)
+
+    def handle(self, *args, **options):
+        self.options = options
+        application = get_wsgi_application()
+        for name, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+            started = time.monotonic()
+            latencies = run(application)
+            rps, p99 = _summary(latencies, time.monotonic() - started)
+            self.stdout.write(f'{name}: {rps:.1f} requests/s, p99 {p99:.1f} ms')
+
+    def environ(self):
+        return {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': self.options['path'], 'QUERY_STRING': '',
+            'SERVER_NAME': self.options['host'], 'SERVER_PORT': '80', 'HTTP_HOST': self.options['host'],
+            'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': self.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+
+    def run_wsgi(self, application):
+        """A threaded WSGI server: each slow client holds a thread until it has read the page."""
+        delay = self.options['client_delay']
+        latencies, lock = [], threading.Lock()
+
+        def serve():
+            response = application(self.environ(), lambda status, headers, exc_info=None: None)
+            try:
+                for chunk in response:
+                    pass
+                time.sleep(delay)
+            finally:
+                response.close()
+
+        def client(executor, remaining):
+            while remaining:
+                remaining -= 1
+                started = time.monotonic()
+                # the clients queue for the server's threads
+                executor.submit(serve).result()
+                with lock:
+                    latencies.append(time.monotonic() - started)
+
+        clients = self.options['clients']
+        share, extra = divmod(self.options['requests'], clients)
+        with ThreadPoolExecutor(self.options['threads']) as executor:
+            threads = [threading.Thread(target=client, args=(executor, share + (i < extra)))
+                       for i in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return latencies
+
+    def run_asgi(self, application):
+        """The ASGI handler: threads only render, the event loop feeds the slow clients."""
+        delay = self.options['client_delay']
+        handler = AsgiHandler(application, self.options['threads'])
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': self.options['path'], 'query_string': b'',
+            'headers': [(b'host', self.options['host'].encode())],
+            'server': (self.options['host'], 80), 'client': ('127.0.0.1', 0),
+        }
+        latencies = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                await asyncio.sleep(delay)
+
+        async def client(remaining):
+            while remaining:
+                remaining -= 1
+                started = time.monotonic()
+                await handler(scope, receive, send)
+                latencies.append(time.monotonic() - started)
+
+        async def main():
+            clients = self.options['clients']
+            share, extra = divmod(self.options['requests'], clients)
+            await asyncio.gather(*(client(share + (i < extra)) for i in range(clients)))
+
+        try:
+            asyncio.run(main())
+        finally:
+            handler.executor.shutdown()
+        return latencies
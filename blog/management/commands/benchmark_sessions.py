@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from blog.models import Blog
+
+
+class Command(BaseCommand):
+    help = (
+        'Walk a logged in blogger through reading, commenting and the dashboard with each '
+        'session store and count the queries every request runs. Changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--store', action='append', dest='stores', choices=sorted(settings.SESSION_ENGINES),
+                            help='Only these session stores, repeatable.')
+
+    def handle(self, *args, **options):
+        blog = Blog.objects.only('slug').first()
+        blogger = get_user_model().objects.bloggers().first()
+        if blog is None or blogger is None:
+            raise CommandError('There is no post or blogger to use, run seed_benchmark first.')
+        steps = [
+            ('post list', 'get', reverse('blog:blog'), None),
+            ('post', 'get', blog.get_absolute_url(), None),
+            ('add comment', 'post', reverse('blog:create_comment', kwargs={'slug': blog.slug}), {'content': 'benchmark'}),
+            ('post + message', 'get', blog.get_absolute_url(), None),
+            ('dashboard', 'get', reverse('dashboard:index'), None),
+        ]
+
+        stores = options['stores'] or list(settings.SESSION_ENGINES)
+        results = {store: self.walk(settings.SESSION_ENGINES[store], blogger, steps, options['host']) for store in stores}
+
+        self.stdout.write(f"{'request':<16}" + ''.join(f'{store:>16}' for store in stores))
+        for index, (name, *_) in enumerate(steps):
+            cells = ''.join(f'{self.cell(results[store][index]):>16}' for store in stores)
+            self.stdout.write(f'{name:<16}{cells}')
+        totals = {store: (sum(q for q, _ in rows), sum(s for _, s in rows)) for store, rows in results.items()}
+        self.stdout.write(f"{'total':<16}" + ''.join(f'{self.cell(totals[store]):>16}' for store in stores))
+        if 'db' in totals:
+            for store in stores:
+                saved = totals['db'][0] - totals[store][0]
+                self.stdout.write(f'{store}: {saved} queries fewer than db over {len(steps)} requests '
+                                  f'({saved / len(steps):.1f} per request)')
+
+    def cell(self, counts):
+        # all queries, of which on django_session
+        return f'{counts[0]} ({counts[1]} session)'
+
+    def walk(self, engine, user, steps, host):
+        counts = []
+        with override_settings(SESSION_ENGINE=engine), transaction.atomic():
+            client = Client(HTTP_HOST=host)
+            client.force_login(user)
+            for name, method, url, data in steps:
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(client, method)(url, data)
+                if response.status_code >= 400:
+                    raise CommandError(f'{name} at {url} answered {response.status_code}.')
+                sessions = sum('django_session' in query['sql'] for query in context.captured_queries)
+                counts.append((len(context), sessions))
+            transaction.set_rollback(True)
+        return counts
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.transfer import export_content
+
+
+class Command(BaseCommand):
+    help = 'Write users, posts and comments as newline-delimited JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help='File to write, "-" for stdout.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # progress goes to stderr so the dump can be piped
+        report = self.stderr.write if options['verbosity'] > 1 else None
+        if options['output'] == '-':
+            progress = export_content(self.stdout, options['batch_size'], report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                progress = export_content(out, options['batch_size'], report)
+        for kind, count in progress.counts.items():
+            self.stderr.write(f'Exported {count} {kind} records ({progress.rate(kind):.0f}/s).')
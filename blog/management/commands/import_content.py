@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_index
+from blog.transfer import Importer
+
+
+class Command(BaseCommand):
+    help = 'Load users, posts and comments written by export_content.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File to read, "-" for stdin.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--reindex', action='store_true', help='Rebuild the search index afterwards.')
+
+    def handle(self, *args, **options):
+        report = self.stdout.write if options['verbosity'] > 1 else None
+        importer = Importer(options['batch_size'], report)
+        if options['input'] == '-':
+            progress = importer.load(sys.stdin)
+        else:
+            with open(options['input'], encoding='utf-8') as lines:
+                progress = importer.load(lines)
+
+        for kind, count in progress.counts.items():
+            self.stdout.write(f'Imported {count} {kind} records ({progress.rate(kind):.0f}/s).')
+        if importer.skipped:
+            self.stdout.write(f'Skipped {importer.skipped} records that already exist or refer to missing ones.')
+
+        # bulk_create sends no signals, so the index has not seen the new rows
+        if options['reindex']:
+            rebuild_index(options['batch_size'])
+        elif progress.counts:
+            self.stdout.write('Run rebuild_search_index to make the imported posts searchable.')
+        self.stdout.write(self.style.SUCCESS('Import finished.'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import cache
+from blog.markup import render
+from blog.models import Blog, Comment
+
+
+class Command(BaseCommand):
+    help = 'Render content_html again for every post and comment, after blog.markup has changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        querysets = (
+            (Blog.objects.only('content', 'content_html', 'slug'), lambda blog: blog.slug),
+            (Comment.objects.select_related('blog').only('content', 'content_html', 'blog__slug'),
+             lambda comment: comment.blog.slug),
+        )
+        for queryset, slug in querysets:
+            name = queryset.model._meta.verbose_name_plural
+            rendered, last_pk = 0, 0
+            while True:
+                # walk the primary key so every batch is an index range scan
+                batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+                if not batch:
+                    break
+                changed = []
+                for obj in batch:
+                    html = render(obj.content)
+                    if html != obj.content_html:
+                        obj.content_html = html
+                        changed.append(obj)
+                if changed:
+                    with transaction.atomic():
+                        queryset.model.objects.bulk_update(changed, ['content_html'])
+                    cache.purge(*{f'blog:{slug(obj)}' for obj in changed})
+                rendered += len(changed)
+                last_pk = batch[-1].pk
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{name}: {rendered} rendered again, up to id {last_pk}')
+            self.stdout.write(f'Rendered {rendered} {name} again.')
+        self.stdout.write(self.style.SUCCESS(
+            'Rendering finished. Cached comment fragments keep the old HTML for up to a day.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Blog
+
+
+class Command(BaseCommand):
+    help = "Recompute every post's comment_count and last_comment_at from its comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        repaired, last_pk = 0, 0
+        while True:
+            # walk the primary key so every batch is an index range scan
+            pks = list(Blog.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                repaired += Blog.objects.filter(pk__in=pks).refresh_comment_stats()
+            last_pk = pks[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{repaired} posts recounted')
+        self.stdout.write(self.style.SUCCESS(f'Recounted comments on {repaired} posts.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from blog.benchmark import seed
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with generated bloggers, readers, posts and comments for the benchmark command.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bloggers', type=int, default=2000)
+        parser.add_argument('--readers', type=int, default=8000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=2000000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--reindex', action='store_true', help='Rebuild the search index afterwards.')
+
+    def handle(self, *args, **options):
+        report = self.stdout.write if options['verbosity'] > 1 else None
+        importer = seed(
+            options['batch_size'], report, bloggers=options['bloggers'], readers=options['readers'],
+            posts=options['posts'], comments=options['comments'], seed=options['seed'])
+        progress = importer.progress
+        for kind, count in progress.counts.items():
+            self.stdout.write(f'Inserted {count} {kind} records ({progress.rate(kind):.0f}/s).')
+        if importer.skipped:
+            self.stdout.write(f'Skipped {importer.skipped} records that already exist.')
+        if options['reindex']:
+            rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Benchmark data ready.'))
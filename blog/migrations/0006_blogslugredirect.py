@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_auto_20190825_0914'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogSlugRedirect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_slug', models.SlugField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_redirects', to='blog.Blog')),
+            ],
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:08
+#
+# Makes Blog.slug unique without holding a table lock on Postgres: duplicate
+# slugs are renamed in small batches, then the unique index is built with
+# CREATE INDEX CONCURRENTLY. The migration is non-atomic so it can be re-run
+# if rows with duplicate slugs are written while it is in progress.
+
+from django.db import migrations, models, transaction
+from django.db.models import Count
+
+INDEX_NAME = 'blog_blog_slug_uniq'
+BATCH_SIZE = 500
+
+
+def deduplicate_slugs(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    duplicates = (Blog.objects.order_by().values('slug').annotate(total=Count('id'))
+                  .filter(total__gt=1).values_list('slug', flat=True))
+
+    for slug in duplicates.iterator():
+        base = slug or 'blog'
+        taken = set(Blog.objects.filter(slug__startswith=base).values_list('slug', flat=True))
+        # the oldest post keeps the slug, the others get numbered suffixes
+        pks = list(Blog.objects.filter(slug=slug).order_by('created_at', 'id').values_list('pk', flat=True)[1:])
+        suffix = 2
+        for start in range(0, len(pks), BATCH_SIZE):
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for pk in pks[start:start + BATCH_SIZE]:
+                    while f'{base}-{suffix}' in taken:
+                        suffix += 1
+                    new_slug = f'{base}-{suffix}'
+                    taken.add(new_slug)
+                    Blog.objects.filter(pk=pk).update(slug=new_slug)
+
+
+def create_unique_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = apps.get_model('blog', 'Blog')._meta.db_table
+    quote = schema_editor.quote_name
+    concurrently = 'CONCURRENTLY ' if connection.vendor == 'postgresql' else ''
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    # the plain index created for the old SlugField(db_index=True) is now redundant
+    redundant = [
+        name for name, info in constraints.items()
+        if info['columns'] == ['slug'] and info['index'] and not info['unique'] and not name.endswith('_like')
+    ]
+
+    # a failed concurrent build leaves an invalid index behind, so drop it first
+    schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {quote(INDEX_NAME)}')
+    schema_editor.execute(f'CREATE UNIQUE INDEX {concurrently}{quote(INDEX_NAME)} ON {quote(table)} ({quote("slug")})')
+    for name in redundant:
+        schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {quote(name)}')
+
+
+def drop_unique_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = apps.get_model('blog', 'Blog')._meta.db_table
+    quote = schema_editor.quote_name
+    concurrently = 'CONCURRENTLY ' if connection.vendor == 'postgresql' else ''
+
+    schema_editor.execute(f'CREATE INDEX {concurrently}IF NOT EXISTS {quote(table + "_slug")} ON {quote(table)} ({quote("slug")})')
+    schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {quote(INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0006_blogslugredirect'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_unique_index, drop_unique_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='blog',
+                    name='slug',
+                    field=models.SlugField(max_length=100, unique=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_unique_blog_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['blog', 'created_at', 'id'], name='blog_comment_thread_idx'),
+        ),
+    ]
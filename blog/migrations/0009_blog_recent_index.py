@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-created_at', 'id'], name='blog_blog_recent_idx'),
+        ),
+    ]
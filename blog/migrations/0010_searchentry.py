@@ -0,0 +1,50 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_search_documents(apps, schema_editor):
+    # the tsvector table is only used by blog.search.PostgresSearchBackend
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE TABLE blog_searchdocument ('
+        'id bigserial PRIMARY KEY, '
+        'blog_id integer NOT NULL REFERENCES blog_blog (id) ON DELETE CASCADE, '
+        'comment_id integer NULL REFERENCES blog_comment (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)'
+    )
+    schema_editor.execute('CREATE INDEX blog_searchdocument_document_idx ON blog_searchdocument USING GIN (document)')
+    schema_editor.execute('CREATE INDEX blog_searchdocument_blog_idx ON blog_searchdocument (blog_id)')
+    schema_editor.execute('CREATE INDEX blog_searchdocument_comment_idx ON blog_searchdocument (comment_id)')
+
+
+def drop_search_documents(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_searchdocument')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_blog_recent_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.Blog')),
+                ('comment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.Comment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['term', 'blog'], name='blog_search_term_idx'),
+        ),
+        migrations.RunPython(create_search_documents, drop_search_documents),
+    ]
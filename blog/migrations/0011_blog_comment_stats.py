@@ -0,0 +1,51 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def backfill_comment_stats(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    Comment = apps.get_model('blog', 'Comment')
+    comments = Comment.objects.filter(blog=OuterRef('pk')).order_by()
+    counts = comments.values('blog').annotate(count=Count('pk')).values('count')
+    latest = comments.order_by('-created_at').values('created_at')[:1]
+
+    pks = list(Blog.objects.filter(comments__isnull=False).order_by('pk').values_list('pk', flat=True).distinct())
+    for start in range(0, len(pks), BATCH_SIZE):
+        Blog.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).update(
+            comment_count=Coalesce(Subquery(counts, output_field=models.IntegerField()), 0),
+            last_comment_at=Subquery(latest, output_field=models.DateTimeField()),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_comment_stats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-comment_count', '-created_at', 'id'], name='blog_blog_discussed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-last_comment_at', 'id'], name='blog_blog_active_idx'),
+        ),
+    ]
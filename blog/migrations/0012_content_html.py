@@ -0,0 +1,152 @@
+import re
+from html import unescape
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+from django.utils.html import escape
+
+# Existing rows are rendered with a copy of blog.markup as it was when
+# content_html was added, so this migration gives the same result whatever
+# that module becomes. `manage.py render_content` brings rows up to date
+# after the renderer changes.
+
+BATCH_SIZE = 1000
+
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+MAX_QUOTE_DEPTH = 3
+
+FENCE = re.compile(r'^\s*```')
+HEADING = re.compile(r'^(#{1,3})\s+(.*?)\s*#*\s*$')
+BULLET = re.compile(r'^\s*[-*+]\s+(.*)$')
+NUMBERED = re.compile(r'^\s*\d{1,9}[.)]\s+(.*)$')
+QUOTE = re.compile(r'^\s*>\s?(.*)$')
+
+CODE_SPAN = re.compile(r'`([^`\n]+)`')
+LINK = re.compile(r'\[([^\]\n]+)\]\(([^)\s]+)\)')
+STRONG = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+EMPHASIS = re.compile(r'(?<![*\w])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![*\w])')
+PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+
+
+def _safe_url(url):
+    # browsers read a backslash as a slash, /\host is another site
+    url = unescape(url).replace('\\', '/')
+    if url.startswith('#') or (url.startswith('/') and not url.startswith('//')):
+        return True
+    try:
+        return urlsplit(url).scheme.lower() in ALLOWED_SCHEMES
+    except ValueError:
+        return False
+
+
+def render_inline(text):
+    """Escape one run of text and apply the inline markup."""
+    stash = []
+
+    def keep(html):
+        stash.append(html)
+        return f'\x00{len(stash) - 1}\x00'
+
+    def link(match):
+        label, url = match.groups()
+        if not _safe_url(url):
+            return match.group(0)
+        # the url is escaped already, quotes included
+        return keep(f'<a href="{url}" rel="nofollow ugc">{_emphasis(label)}</a>')
+
+    text = escape(text.replace('\x00', ''))
+    # code and links are set aside so emphasis never reaches inside them
+    text = CODE_SPAN.sub(lambda match: keep(f'<code>{match.group(1)}</code>'), text)
+    text = LINK.sub(link, text)
+    text = _emphasis(text)
+    return PLACEHOLDER.sub(lambda match: stash[int(match.group(1))], text)
+
+
+def _emphasis(text):
+    text = STRONG.sub(r'<strong>\1</strong>', text)
+    return EMPHASIS.sub(r'<em>\1</em>', text)
+
+
+def render(text, depth=0):
+    """Return the HTML for ``text``."""
+    lines = (text or '').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    blocks, i = [], 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+        elif FENCE.match(line):
+            end = next((j for j in range(i + 1, len(lines)) if FENCE.match(lines[j])), len(lines))
+            code = escape('\n'.join(lines[i + 1:end]).replace('\x00', ''))
+            blocks.append(f'<pre><code>{code}</code></pre>')
+            i = end + 1
+        elif HEADING.match(line):
+            hashes, title = HEADING.match(line).groups()
+            # the page title is the h1
+            level = len(hashes) + 1
+            blocks.append(f'<h{level}>{render_inline(title)}</h{level}>')
+            i += 1
+        elif QUOTE.match(line) and depth < MAX_QUOTE_DEPTH:
+            quoted, i = _take(lines, i, QUOTE)
+            blocks.append(f'<blockquote>{render(chr(10).join(quoted), depth + 1)}</blockquote>')
+        elif BULLET.match(line) or NUMBERED.match(line):
+            pattern, tag = (BULLET, 'ul') if BULLET.match(line) else (NUMBERED, 'ol')
+            items, i = _take(lines, i, pattern)
+            blocks.append(f'<{tag}>' + ''.join(f'<li>{render_inline(item)}</li>' for item in items) + f'</{tag}>')
+        else:
+            start = i
+            while i < len(lines) and lines[i].strip() and not _starts_block(lines[i], depth):
+                i += 1
+            i = max(i, start + 1)
+            paragraph = '<br>'.join(render_inline(line.strip()) for line in lines[start:i])
+            blocks.append(f'<p>{paragraph}</p>')
+    return '\n'.join(blocks)
+
+
+def _take(lines, i, pattern):
+    """Collect the consecutive lines matching ``pattern`` from ``i``."""
+    taken = []
+    while i < len(lines) and pattern.match(lines[i]):
+        taken.append(pattern.match(lines[i]).group(1))
+        i += 1
+    return taken, i
+
+
+def _starts_block(line, depth):
+    return bool(FENCE.match(line) or HEADING.match(line) or BULLET.match(line) or NUMBERED.match(line)
+                or (QUOTE.match(line) and depth < MAX_QUOTE_DEPTH))
+
+
+def render_content(apps, schema_editor):
+    for name in ('Blog', 'Comment'):
+        model = apps.get_model('blog', name)
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('content')[:BATCH_SIZE])
+            if not batch:
+                break
+            for obj in batch:
+                obj.content_html = render(obj.content)
+            model.objects.bulk_update(batch, ['content_html'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_blog_comment_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='content_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='content_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(render_content, migrations.RunPython.noop),
+    ]
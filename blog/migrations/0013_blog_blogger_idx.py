@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_content_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['blogger', '-created_at', 'id'], name='blog_blog_blogger_idx'),
+        ),
+    ]
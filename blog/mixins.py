@@ -0,0 +1,85 @@
+import hashlib
+
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET/HEAD requests with 304 Not Modified once the
+    view has loaded its data but before the template is rendered. The page
+    queries still run, so a 304 only saves the rendering and the bytes.
+
+    Views return the values their page shows from ``get_etag_data``. No
+    Last-Modified is sent: the newest timestamp on a page goes back in
+    time when a row is deleted, and a client sending only
+    If-Modified-Since would keep the stale page.
+    """
+
+    def get_etag_data(self, context):
+        return None
+
+    def render_to_response(self, context, **response_kwargs):
+        request = self.request
+        # a pending flash message changes the page without changing the data
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return super().render_to_response(context, **response_kwargs)
+
+        etag = self._make_etag(self.get_etag_data(context))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().render_to_response(context, **response_kwargs)
+        if etag:
+            response.setdefault('ETag', etag)
+        return response
+
+    def _make_etag(self, data):
+        if data is None:
+            return None
+        # the navigation differs per reader, so the reader is part of the tag
+        data = [self.request.user.pk, self.get_template_names()] + list(data)
+        return quote_etag(hashlib.md5(repr(data).encode()).hexdigest())
+
+
+class OwnerRequiredMixin:
+    """
+    Load the object once per request, in a query that only matches it if
+    ``owner_field`` is the current user, and reuse it for the form, the
+    delete and the success URL. Anyone else gets 403; a missing object 404.
+    """
+    owner_field = 'user'
+    owner_select_related = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        if getattr(self, '_owned_object', None) is not None:
+            return self._owned_object
+        user = self.request.user
+        if not user.is_authenticated:
+            raise PermissionDenied
+        if queryset is None:
+            queryset = self.get_queryset()
+        owned = queryset.filter(**{self.owner_field: user}).select_related(*self.owner_select_related)
+        try:
+            obj = super().get_object(owned)
+        except Http404:
+            # only a miss pays for telling "not yours" from "not there"
+            if self._exists(queryset):
+                raise PermissionDenied
+            raise
+        # the owner is the reader, no need to load it again
+        setattr(obj, self.owner_field, user)
+        self._owned_object = obj
+        return obj
+
+    def _exists(self, queryset):
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        if pk is not None:
+            return queryset.filter(pk=pk).exists()
+        return queryset.filter(**{self.get_slug_field(): self.kwargs.get(self.slug_url_kwarg)}).exists()
@@ -1,28 +1,167 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.urls import reverse
 from django.utils.text import slugify
 
+from diy_blog.guards import DeferredLoadGuardMixin
+
+from .markup import render
+
+
+# Slugs that would be shadowed by the fixed routes in blog/urls.py.
+RESERVED_SLUGS = {'blogs', 'bloggers', 'blogger', 'feeds', 'search', 'api'}
+SLUG_ATTEMPTS = 3
+# maintained by F() updates from the comment signals, never by Blog.save()
+COMMENT_STAT_FIELDS = ('comment_count', 'last_comment_at')
+# what a list of posts shows, links to and orders or tags its pages by; the
+# blogger id is read by blogger.blogs querysets for every row they return
+LISTING_FIELDS = ('title', 'slug', 'created_at', 'updated_at', 'blogger') + COMMENT_STAT_FIELDS
+
+
+class RenderedContentMixin:
+    """Keep ``content_html`` rendered from ``content`` whenever content is saved."""
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'content' in update_fields:
+                self.content_html = render(self.content)
+                kwargs['update_fields'] = {*update_fields, 'content_html'}
+        elif 'content' not in self.get_deferred_fields():
+            self.content_html = render(self.content)
+        super().save(*args, **kwargs)
+
+
+def render_missing_html(objs):
+    for obj in objs:
+        if not obj.content_html:
+            obj.content_html = render(obj.content)
+
 
-class Blog(models.Model):
+class BlogQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Posts without their bodies, for pages that only list them."""
+        return self.only(*LISTING_FIELDS)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() is not called, so render here
+        objs = list(objs)
+        render_missing_html(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def comment_added(self, created_at, count=1):
+        """Count ``count`` new comments and move last_comment_at forward to the latest, ``created_at``."""
+        return self.update(
+            comment_count=models.F('comment_count') + count,
+            last_comment_at=models.Case(
+                models.When(last_comment_at__gte=created_at, then=models.F('last_comment_at')),
+                default=models.Value(created_at),
+                output_field=models.DateTimeField(),
+            ),
+        )
+
+    def comment_removed(self):
+        return self.update(
+            comment_count=Greatest(models.F('comment_count') - 1, models.Value(0)),
+            last_comment_at=self._latest_comment(),
+        )
+
+    def refresh_comment_stats(self):
+        """Recompute comment_count and last_comment_at from the comments themselves."""
+        counts = (Comment.objects.filter(blog=models.OuterRef('pk')).order_by()
+                  .values('blog').annotate(count=models.Count('pk')).values('count'))
+        return self.update(
+            comment_count=Coalesce(models.Subquery(counts, output_field=models.IntegerField()), 0),
+            last_comment_at=self._latest_comment(),
+        )
+
+    def _latest_comment(self):
+        latest = Comment.objects.filter(blog=models.OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+        return models.Subquery(latest, output_field=models.DateTimeField())
+
+
+class Blog(DeferredLoadGuardMixin, RenderedContentMixin, models.Model):
     title = models.CharField(max_length=64)
     content = models.TextField()
+    # blog.markup's rendering of content, so reading a post never parses it
+    content_html = models.TextField(default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     blogger = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='blogs')
-    slug = models.SlugField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    # kept up to date by the comment signals in blog.signals
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = BlogQuerySet.as_manager()
 
     class Meta:
         permissions = [
             ('blogger', 'create update and delete blogs'),
         ]
         ordering = ['-created_at']
-    
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='blog_blog_recent_idx'),
+            models.Index(fields=['-comment_count', '-created_at', 'id'], name='blog_blog_discussed_idx'),
+            models.Index(fields=['-last_comment_at', 'id'], name='blog_blog_active_idx'),
+            models.Index(fields=['blogger', '-created_at', 'id'], name='blog_blog_blogger_idx'),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # remember the slug as loaded so a rename can leave a redirect behind
+        self._loaded_slug = self.__dict__.get('slug') if self.pk else None
+
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
-    
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # never write back comment stats a concurrent comment may have moved on
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in COMMENT_STAT_FIELDS
+            ]
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = self.allocate_slug()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    self._record_slug_change()
+                break
+            except IntegrityError:
+                # another request claimed the same slug first, pick again
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
+        self._loaded_slug = self.slug
+
+    def allocate_slug(self):
+        """Return a slug for the title that no other blog or redirect uses."""
+        base = slugify(self.title)[:64] or 'blog'
+        pattern = re.compile(r'^%s(?:-\d+)?$' % re.escape(base))
+        blogs = Blog.objects.filter(slug__startswith=base).exclude(pk=self.pk)
+        redirects = BlogSlugRedirect.objects.filter(old_slug__startswith=base).exclude(blog_id=self.pk)
+        taken = set(blogs.values_list('slug', flat=True))
+        taken.update(redirects.values_list('old_slug', flat=True))
+        taken.update(RESERVED_SLUGS)
+
+        # keep the current slug while it still matches the title
+        if self.slug and pattern.match(self.slug) and self.slug not in taken:
+            return self.slug
+
+        slug, suffix = base, 2
+        while slug in taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        return slug
+
+    def _record_slug_change(self):
+        if self._loaded_slug and self._loaded_slug != self.slug:
+            BlogSlugRedirect.objects.update_or_create(old_slug=self._loaded_slug, defaults={'blog': self})
+        BlogSlugRedirect.objects.filter(old_slug=self.slug).delete()
+
     def get_absolute_url(self):
         return reverse("blog:detail", kwargs={"slug": self.slug})
     
@@ -31,18 +170,79 @@ class Blog(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class BlogSlugRedirect(models.Model):
+    old_slug = models.SlugField(max_length=100, unique=True)
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='slug_redirects')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.old_slug} -> {self.blog_id}'
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_display(self):
+        """Comments with their authors, limited to the columns the templates use."""
+        return self.select_related('user').only(
+            'content_html', 'created_at', 'updated_at', 'blog', 'user', 'user__username')
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        render_missing_html(objs)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        # no signals are sent, so count the new comments here
+        if kwargs.get('ignore_conflicts'):
+            # some rows may not have been inserted
+            Blog.objects.filter(pk__in={obj.blog_id for obj in objs}).refresh_comment_stats()
+            return objs
+        added = {}
+        for obj in objs:
+            count, latest = added.get(obj.blog_id, (0, obj.created_at))
+            added[obj.blog_id] = count + 1, max(latest, obj.created_at)
+        for blog_id, (count, latest) in added.items():
+            Blog.objects.filter(pk=blog_id).comment_added(latest, count)
+        return objs
+
+
+class Comment(DeferredLoadGuardMixin, RenderedContentMixin, models.Model):
     content = models.TextField()
+    content_html = models.TextField(default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='comments')
     blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='comments')
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['blog', 'created_at', 'id'], name='blog_comment_thread_idx'),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # remember the post as loaded so moving a comment recounts both posts
+        self._loaded_blog_id = self.__dict__.get('blog_id') if self.pk else None
 
     def __str__(self):
         if len(self.content) <= 75:
             return self.content
         else:
-            return f'{self.content[:75]}...'
\ No newline at end of file
+            return f'{self.content[:75]}...'
+
+
+class SearchEntry(models.Model):
+    """
+    One term of the inverted index used by blog.search.DatabaseSearchBackend.
+    Rows for a post's title and content have no comment; rows taken from a
+    comment point at it so they can be replaced one comment at a time.
+    """
+    term = models.CharField(max_length=64)
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='+')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, related_name='+')
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'blog'], name='blog_search_term_idx'),
+        ]
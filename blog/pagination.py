@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+
+NEXT, PREVIOUS = '>', '<'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator, iterable like a Django Page."""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row seen instead of using
+    OFFSET, so no page needs a COUNT and deep pages cost the same as the
+    first. ``ordering`` must be unique per row, so end it with the primary
+    key. Cursors are opaque tokens holding the ordering values of the row
+    to seek from and the direction to go.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def page(self, cursor=None):
+        direction, values = self.decode(cursor) if cursor else (NEXT, None)
+        backwards = direction == PREVIOUS
+        queryset = self.queryset.order_by(*self._ordering(backwards))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return KeysetPage(
+            rows, self,
+            next_cursor=self.encode(rows[-1], NEXT) if has_next and rows else None,
+            previous_cursor=self.encode(rows[0], PREVIOUS) if has_previous and rows else None,
+        )
+
+    def _ordering(self, backwards):
+        return [name if descending == backwards else f'-{name}' for name, descending in self.fields]
+
+    def _seek(self, values, backwards):
+        # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), per field direction
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = {f'{name}__lt' if descending != backwards else f'{name}__gt': values[index]}
+            lookup.update({prior: values[i] for i, (prior, _) in enumerate(self.fields[:index])})
+            condition |= Q(**lookup)
+        return condition
+
+    def encode(self, obj, direction=NEXT):
+        # rows may be model instances or .values() dicts
+        values = [obj[name] if isinstance(obj, dict) else getattr(obj, name) for name, _ in self.fields]
+        # full isoformat, DjangoJSONEncoder would drop the microseconds
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        data = json.dumps([direction] + values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (binascii.Error, ValueError, UnicodeError):
+            raise InvalidCursor('That cursor is not valid.')
+        if not isinstance(data, list) or len(data) != len(self.fields) + 1 or data[0] not in (NEXT, PREVIOUS):
+            raise InvalidCursor('That cursor is not valid.')
+
+        opts = self.queryset.model._meta
+        try:
+            values = [opts.get_field(name).to_python(value) for (name, _), value in zip(self.fields, data[1:])]
+        except ValidationError:
+            raise InvalidCursor('That cursor is not valid.')
+        if any(value is None for value in values):
+            raise InvalidCursor('That cursor is not valid.')
+        return data[0], values
+
+
+def page_signature(page):
+    """Values that change whenever the pagination links of ``page`` do."""
+    if isinstance(page, KeysetPage):
+        return (page.next_cursor, page.previous_cursor)
+    return (page.number, page.paginator.num_pages)
+
+
+class CursorPaginationMixin:
+    """
+    Cursor pagination for a ListView. Requests without ``?page=`` get a
+    KeysetPaginator page with next/previous cursors; ``?page=`` links keep
+    working through Django's numbered paginator.
+    """
+    cursor_ordering = ('-created_at', 'id')
+    cursor_kwarg = 'cursor'
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_cursor_ordering()
+        queryset = queryset.order_by(*ordering)
+        if self.page_kwarg in self.kwargs or self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
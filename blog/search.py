@@ -0,0 +1,160 @@
+"""
+Ranked search over post titles, post content and comments.
+
+The index is kept current from signals (see blog.signals), through
+background jobs: a post's own text and each comment are indexed as
+separate documents, so an edit only rewrites the rows of the document
+that changed. Two backends share that
+shape:
+
+``PostgresSearchBackend`` keeps one tsvector per document in the
+blog_searchdocument table (created by migration 0010 on Postgres only)
+behind a GIN index. ``DatabaseSearchBackend`` keeps its own inverted index
+of (term, blog, weight) rows in SearchEntry and works on any database,
+which is what the tests run against.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils.module_loading import import_string
+
+from .models import Blog, Comment, SearchEntry
+
+TITLE_WEIGHT = 8
+CONTENT_WEIGHT = 2
+COMMENT_WEIGHT = 1
+# repeating a word past this stops raising the score
+MAX_OCCURRENCES = 5
+
+WORD_RE = re.compile(r'\w+')
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have i in is it its of on or
+    that the this to was were will with you your
+""".split())
+
+
+def tokenize(text):
+    """Lower-cased words of ``text`` without stop words or single letters."""
+    return [word[:64] for word in WORD_RE.findall(text.lower())
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+class DatabaseSearchBackend:
+    def index_blog(self, blog):
+        weights = Counter()
+        for field, weight in ((blog.title, TITLE_WEIGHT), (blog.content, CONTENT_WEIGHT)):
+            for term, count in Counter(tokenize(field)).items():
+                weights[term] += min(count, MAX_OCCURRENCES) * weight
+        with transaction.atomic():
+            SearchEntry.objects.filter(blog=blog, comment=None).delete()
+            SearchEntry.objects.bulk_create(
+                SearchEntry(term=term, blog=blog, weight=weight) for term, weight in weights.items())
+
+    def index_comment(self, comment):
+        entries = [
+            SearchEntry(term=term, blog_id=comment.blog_id, comment=comment,
+                        weight=min(count, MAX_OCCURRENCES) * COMMENT_WEIGHT)
+            for term, count in Counter(tokenize(comment.content)).items()
+        ]
+        with transaction.atomic():
+            SearchEntry.objects.filter(comment=comment).delete()
+            SearchEntry.objects.bulk_create(entries)
+
+    def search(self, query, limit):
+        """Return (blog id, score) pairs, best match first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        # posts matching more of the query words rank first
+        results = (SearchEntry.objects.filter(term__in=terms)
+                   .values('blog')
+                   .annotate(matched=models.Count('term', distinct=True), score=models.Sum('weight'))
+                   .order_by('-matched', '-score', 'blog')[:limit])
+        return [(row['blog'], row['score']) for row in results]
+
+    def clear(self):
+        SearchEntry.objects.all().delete()
+
+
+class PostgresSearchBackend:
+    config = 'english'
+    table = 'blog_searchdocument'
+
+    def index_blog(self, blog):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE blog_id = %s AND comment_id IS NULL', [blog.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (blog_id, comment_id, document) VALUES '
+                f'(%s, NULL, setweight(to_tsvector(%s, %s), \'A\') || setweight(to_tsvector(%s, %s), \'B\'))',
+                [blog.pk, self.config, blog.title, self.config, blog.content])
+
+    def index_comment(self, comment):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE comment_id = %s', [comment.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (blog_id, comment_id, document) VALUES '
+                f'(%s, %s, setweight(to_tsvector(%s, %s), \'D\'))',
+                [comment.blog_id, comment.pk, self.config, comment.content])
+
+    def search(self, query, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT blog_id, SUM(ts_rank(document, query)) AS rank '
+                f'FROM {self.table}, plainto_tsquery(%s, %s) query '
+                f'WHERE document @@ query GROUP BY blog_id ORDER BY rank DESC, blog_id LIMIT %s',
+                [self.config, query, limit])
+            return cursor.fetchall()
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+
+
+def get_backend():
+    path = settings.SEARCH_BACKEND
+    if not path:
+        path = 'blog.search.PostgresSearchBackend' if connection.vendor == 'postgresql' else 'blog.search.DatabaseSearchBackend'
+    return import_string(path)()
+
+
+def search_blogs(query, limit=50):
+    """Posts matching ``query`` in rank order, with only the columns a result list shows."""
+    ranked = [blog_id for blog_id, _ in get_backend().search(query, limit)]
+    blogs = Blog.objects.only('title', 'slug', 'created_at').in_bulk(ranked)
+    return [blogs[blog_id] for blog_id in ranked if blog_id in blogs]
+
+
+def index_blog(blog):
+    get_backend().index_blog(blog)
+
+
+def index_comment(comment):
+    if settings.SEARCH_INCLUDE_COMMENTS:
+        get_backend().index_comment(comment)
+
+
+def reindex_blog(pk):
+    """Job queued when a post is saved."""
+    # a post deleted meanwhile took its index rows with it
+    blog = Blog.objects.only('title', 'content').filter(pk=pk).first()
+    if blog is not None:
+        index_blog(blog)
+
+
+def reindex_comment(pk):
+    """Job queued when a comment is saved."""
+    comment = Comment.objects.only('content', 'blog').filter(pk=pk).first()
+    if comment is not None:
+        index_comment(comment)
+
+
+def rebuild_index(batch_size=500):
+    backend = get_backend()
+    backend.clear()
+    for blog in Blog.objects.only('title', 'content').iterator(chunk_size=batch_size):
+        backend.index_blog(blog)
+    if settings.SEARCH_INCLUDE_COMMENTS:
+        for comment in Comment.objects.only('content', 'blog').iterator(chunk_size=batch_size):
+            backend.index_comment(comment)
@@ -0,0 +1,133 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from . import cache, search
+from .models import Blog, Comment
+
+# posts being deleted on this thread, whose comments go with them
+_deleting = threading.local()
+
+
+def _blog_deleted(blog_id):
+    return blog_id in getattr(_deleting, 'blogs', ())
+
+
+def _comment_blog_slug(comment):
+    # the blog is usually cached on the instance already, fall back to one lookup
+    if 'blog' in comment._state.fields_cache:
+        return comment.blog.slug
+    return Blog.objects.filter(pk=comment.blog_id).values_list('slug', flat=True).first()
+
+
+@receiver(pre_delete, sender=Blog)
+def start_blog_delete(sender, instance, **kwargs):
+    # the collector deletes the comments first, one signal each
+    if not hasattr(_deleting, 'blogs'):
+        _deleting.blogs = set()
+    _deleting.blogs.add(instance.pk)
+
+
+@receiver(post_delete, sender=Blog)
+def end_blog_delete(sender, instance, **kwargs):
+    _deleting.blogs.discard(instance.pk)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def purge_blog_pages(sender, instance, signal, created=False, **kwargs):
+    tags = ['blogs', f'blog:{instance.slug}', f'blogger:{instance.blogger_id}']
+    if created or signal is post_delete:
+        # the bloggers directory shows post counts and latest post dates
+        tags.append('bloggers')
+    if instance._loaded_slug and instance._loaded_slug != instance.slug:
+        tags.append(f'blog:{instance._loaded_slug}')
+    cache.purge(*tags)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Blog.objects.filter(pk=instance.blog_id).comment_added(instance.created_at)
+    elif instance._loaded_blog_id != instance.blog_id:
+        Blog.objects.filter(pk__in=[instance._loaded_blog_id, instance.blog_id]).refresh_comment_stats()
+    instance._loaded_blog_id = instance.blog_id
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if _blog_deleted(instance.blog_id):
+        return
+    Blog.objects.filter(pk=instance.blog_id).comment_removed()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, signal, **kwargs):
+    if signal is post_delete and _blog_deleted(instance.blog_id):
+        # the post's own receiver purges these pages
+        return
+    # the post list shows comment counts too
+    tags = ['blogs']
+    slug = _comment_blog_slug(instance)
+    if slug:
+        tags.append(f'blog:{slug}')
+    cache.purge(*tags)
+
+
+@receiver(post_save, sender=Blog)
+def index_blog(sender, instance, update_fields=None, raw=False, **kwargs):
+    # deleting a post or comment drops its index rows by cascade
+    if raw or (update_fields is not None and not {'title', 'content'} & set(update_fields)):
+        return
+    enqueue(search.reindex_blog, instance.pk, key=f'search:blog:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and 'content' not in update_fields):
+        return
+    if settings.SEARCH_INCLUDE_COMMENTS:
+        enqueue(search.reindex_comment, instance.pk, key=f'search:comment:{instance.pk}')
+
+
+@receiver(post_save, sender=get_user_model())
+def purge_blogger_pages(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    tags = ['bloggers', f'blogger:{instance.pk}']
+    if instance._loaded_username and instance._loaded_username != instance.username:
+        # posts show their author's and commenters' names, the post lists their authors'
+        slugs = (Blog.objects.filter(Q(blogger=instance) | Q(comments__user=instance))
+                 .order_by().values_list('slug', flat=True).distinct())
+        tags += ['blogs', *(f'blog:{slug}' for slug in slugs.iterator())]
+    cache.purge(*tags)
+
+
+@receiver(post_delete, sender=get_user_model())
+def purge_deleted_blogger_pages(sender, instance, **kwargs):
+    cache.purge('bloggers', f'blogger:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def purge_blogger_membership_pages(sender, instance, action, reverse, pk_set, model, **kwargs):
+    """Someone may have become, or stopped being, a blogger."""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, get_user_model()):
+        cache.purge('bloggers', f'blogger:{instance.pk}')
+    elif model is get_user_model() and pk_set is not None:
+        cache.purge('bloggers', *(f'blogger:{pk}' for pk in pk_set))
+    else:
+        cache.purge('bloggers', 'blogger-pages')
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from blog.models import Blog, Comment
 
@@ -34,3 +36,16 @@ class TestDataMixin:
         Comment.objects.create(blog=cls.blog1, content='x'*128, user=cls.commenter)
         Comment.objects.create(blog=cls.blog2, content='x'*128, user=cls.user1)
 
+
+class QueryBudgetMixin:
+    """Assert that a view stays within a fixed number of database queries."""
+
+    def assertQueryBudget(self, budget, url, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f'{url} ran {len(context)} queries, budget is {budget}:\n{queries}')
+        return response
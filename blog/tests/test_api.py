@@ -0,0 +1,100 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Blog, Comment
+from blog.tests.mixins import QueryBudgetMixin, TestDataMixin
+
+
+class BlogListApiTest(TestDataMixin, QueryBudgetMixin, TestCase):
+    def test_first_page(self):
+        response = self.assertQueryBudget(1, reverse('blog:api_blogs') + '?limit=3')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual(len(data['results']), 3)
+        newest = Blog.objects.order_by('-created_at', 'id').first()
+        self.assertEqual(data['results'][0]['slug'], newest.slug)
+        self.assertEqual(data['results'][0]['blogger'], {'id': self.user1.pk, 'username': 'scrubby'})
+        self.assertIsNone(data['previous'])
+        self.assertIn('cursor=', data['next'])
+
+    def test_walk_the_cursors(self):
+        url, slugs = reverse('blog:api_blogs') + '?limit=3', []
+        while url:
+            data = self.client.get(url).json()
+            slugs += [blog['slug'] for blog in data['results']]
+            url = data['next']
+        self.assertEqual(slugs, list(Blog.objects.order_by('-created_at', 'id').values_list('slug', flat=True)))
+
+    def test_sort_and_blogger_filter(self):
+        data = self.client.get(reverse('blog:api_blogs'), {'sort': 'discussed', 'blogger': self.user.pk}).json()
+        self.assertEqual([blog['slug'] for blog in data['results']], [self.blog2.slug, self.blog1.slug])
+        self.assertEqual(data['results'][0]['comment_count'], 1)
+
+    def test_bad_parameters(self):
+        for query in ({'cursor': 'nonsense'}, {'limit': 'x'}, {'blogger': 'x'}):
+            response = self.client.get(reverse('blog:api_blogs'), query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+    def test_etag(self):
+        response = self.client.get(reverse('blog:api_blogs'))
+        response = self.client.get(reverse('blog:api_blogs'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(blog=self.blog1, content='new', user=self.commenter)
+        response = self.client.get(reverse('blog:api_blogs'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post(reverse('blog:api_blogs')).status_code, 405)
+
+
+class BlogDetailApiTest(TestDataMixin, QueryBudgetMixin, TestCase):
+    def test_post_with_comments(self):
+        response = self.assertQueryBudget(2, reverse('blog:api_blog', kwargs={'slug': self.blog1.slug}))
+        data = response.json()
+        self.assertEqual(data['title'], 'blog post')
+        self.assertEqual(data['content'], 'x' * 128)
+        self.assertEqual(data['blogger']['username'], 'testuser')
+        self.assertEqual([comment['user']['username'] for comment in data['comments']['results']], ['commenter'])
+        self.assertIsNone(data['comments']['next'])
+
+    def test_comment_pages(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        Comment.objects.bulk_create(
+            Comment(blog=blog, user=self.commenter, content=f'comment {n}') for n in range(60))
+        data = self.client.get(reverse('blog:api_blog', kwargs={'slug': blog.slug})).json()
+        self.assertEqual(len(data['comments']['results']), 50)
+        data = self.client.get(data['comments']['next']).json()
+        self.assertEqual(len(data['comments']['results']), 11)
+
+    def test_renamed_post_redirects(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        old_slug = blog.slug
+        blog.title = 'renamed post'
+        blog.save()
+        response = self.client.get(reverse('blog:api_blog', kwargs={'slug': old_slug}))
+        self.assertRedirects(response, reverse('blog:api_blog', kwargs={'slug': 'renamed-post'}), status_code=301)
+
+    def test_missing_post(self):
+        self.assertEqual(self.client.get(reverse('blog:api_blog', kwargs={'slug': 'nope'})).status_code, 404)
+
+
+class BloggerListApiTest(TestDataMixin, TestCase):
+    def test_streams_every_blogger(self):
+        response = self.client.get(reverse('blog:api_bloggers'))
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([blogger['username'] for blogger in data['results']], ['clark_kent', 'scrubby', 'testuser'])
+        self.assertEqual(data['results'][2]['bio'], 'testuser is a blogger.')
+        self.assertEqual(set(data['results'][0]), {'id', 'username', 'bio'})
+
+    def test_etag_follows_profile_changes(self):
+        etag = self.client.get(reverse('blog:api_bloggers'))['ETag']
+        self.assertEqual(self.client.get(reverse('blog:api_bloggers'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.bio = 'changed'
+        user.save()
+        self.assertEqual(self.client.get(reverse('blog:api_bloggers'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
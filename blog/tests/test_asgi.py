@@ -0,0 +1,181 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase, TransactionTestCase
+
+import users.models
+from blog.models import Blog
+from diy_blog.handlers import AsgiHandler
+
+
+def call(handler, scope, body=b''):
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    return sent
+
+
+def http_scope(path, query_string=b'', method='GET', headers=()):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': [(b'host', b'127.0.0.1'), *headers],
+        'server': ('127.0.0.1', 8000), 'client': ('10.0.0.1', 5000),
+    }
+
+
+class AsgiHandlerTest(TransactionTestCase):
+    # views run on the handler's threads, which only see committed rows
+
+    def setUp(self):
+        users.models._blogger_permission_id = None
+        self.user = get_user_model().objects.create_user(username='asgi', password='12345')
+        self.blog = Blog.objects.create(blogger=self.user, title='served over asgi', content='x')
+        self.handler = AsgiHandler(get_wsgi_application(), threads=2)
+        self.addCleanup(self.handler.executor.shutdown)
+
+    def response(self, sent):
+        start, *body = sent
+        return start, b''.join(message['body'] for message in body)
+
+    def test_list_page(self):
+        start, body = self.response(call(self.handler, http_scope('/blog/blogs/')))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'), start['headers'])
+        self.assertIn(b'served over asgi', body)
+
+    def test_query_string(self):
+        start, body = self.response(call(self.handler, http_scope('/blog/search/', b'q=asgi')))
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'served over asgi', body)
+
+    def test_not_found(self):
+        start, body = self.response(call(self.handler, http_scope('/blog/blogger/999/')))
+        self.assertEqual(start['status'], 404)
+
+    def test_streaming_response_is_sent_in_chunks(self):
+        sent = call(self.handler, http_scope('/blog/feeds/rss/'))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(sent[1]['more_body'])
+        self.assertFalse(sent[-1].get('more_body'))
+        self.assertIn(b'served over asgi', b''.join(message['body'] for message in sent[1:]))
+
+    def test_client_gone_before_the_body(self):
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            self.fail('nothing should be sent')
+
+        asyncio.run(self.handler(http_scope('/blog/blogs/'), receive, send))
+
+
+class AsgiEnvironTest(SimpleTestCase):
+    def test_environ(self):
+        handler = AsgiHandler(None, threads=1)
+        self.addCleanup(handler.executor.shutdown)
+        body = asyncio.run(handler.read_body(iter_receive(b'a=1', b'&b=2')))
+        scope = http_scope('/blog/café/', b'x=1', 'POST', headers=[
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', b'7'),
+            (b'accept', b'text/html'), (b'accept', b'*/*'),
+        ])
+        environ = handler.environ(scope, body)
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(environ['PATH_INFO'].encode('latin-1').decode(), '/blog/café/')
+        self.assertEqual(environ['QUERY_STRING'], 'x=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/x-www-form-urlencoded')
+        self.assertEqual(environ['CONTENT_LENGTH'], '7')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(environ['wsgi.input'].read(), b'a=1&b=2')
+
+    def test_lifespan(self):
+        handler = AsgiHandler(None, threads=1)
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(handler({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+class StreamingApp:
+    """A WSGI app that streams a few chunks and notes the thread of each step."""
+
+    streaming = True
+
+    def __init__(self, chunks=3):
+        self.chunks = chunks
+        self.threads = []
+        self.closed = False
+
+    def __call__(self, environ, start_response):
+        self.threads.append(threading.get_ident())
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return self
+
+    def __iter__(self):
+        for n in range(self.chunks):
+            self.threads.append(threading.get_ident())
+            yield b'%d' % n
+
+    def close(self):
+        self.threads.append(threading.get_ident())
+        self.closed = True
+
+
+class AsgiStreamingTest(SimpleTestCase):
+    def setUp(self):
+        self.handler = AsgiHandler(None, threads=4)
+        self.addCleanup(self.handler.executor.shutdown)
+
+    def test_body_and_close_run_on_the_view_thread(self):
+        self.handler.wsgi_application = app = StreamingApp(chunks=20)
+        sent = call(self.handler, http_scope('/'))
+        body = b''.join(message['body'] for message in sent[1:])
+        self.assertEqual(body, b''.join(b'%d' % n for n in range(20)))
+        self.assertTrue(app.closed)
+        self.assertEqual(len(app.threads), 22)
+        self.assertEqual(len(set(app.threads)), 1)
+        self.assertNotEqual(app.threads[0], threading.get_ident())
+
+    def test_client_gone_while_streaming(self):
+        self.handler.wsgi_application = app = StreamingApp(chunks=100)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if len(sent) == 2:
+                raise OSError('connection reset')
+            sent.append(message)
+
+        with self.assertRaises(OSError):
+            asyncio.run(self.handler(http_scope('/'), receive, send))
+        self.assertTrue(app.closed)
+        self.assertEqual(len(set(app.threads)), 1)
+        self.assertLess(len(app.threads), 100)
+
+
+def iter_receive(*chunks):
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in chunks]
+    messages[-1]['more_body'] = False
+
+    async def receive():
+        return messages.pop(0)
+    return receive
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+import users.models
+from blog import benchmark
+from blog.models import Blog, Comment
+
+SIZES = {'bloggers': 3, 'readers': 5, 'posts': 12, 'comments': 60}
+
+
+class DatasetTest(SimpleTestCase):
+    def test_same_seed_same_data(self):
+        records = list(benchmark.dataset(**SIZES))
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['user'] * 8 + ['blog'] * 12 + ['comment'] * 60)
+        self.assertEqual(
+            [record['content'] for record in records[8:]],
+            [record['content'] for record in list(benchmark.dataset(**SIZES))[8:]])
+
+
+class RegressionsTest(SimpleTestCase):
+    baseline = {'blog:detail': {'rps': 100, 'p95_ms': 20, 'queries': 3}}
+
+    def summary(self, **values):
+        return {'blog:detail': dict(self.baseline['blog:detail'], **values)}
+
+    def test_within_tolerance(self):
+        self.assertEqual(benchmark.regressions(self.summary(rps=80, p95_ms=25), self.baseline), [])
+
+    def test_slower_or_more_queries(self):
+        found = benchmark.regressions(self.summary(rps=60, p95_ms=40, queries=4), self.baseline)
+        self.assertEqual(len(found), 3)
+
+    def test_views_missing_from_the_baseline_are_skipped(self):
+        self.assertEqual(benchmark.regressions(self.summary(), {}), [])
+
+
+class BenchmarkCommandTest(TransactionTestCase):
+    # the driver's threads have their own connections and only see committed rows
+
+    def setUp(self):
+        users.models._blogger_permission_id = None
+        call_command('seed_benchmark', *(f'--{name}={size}' for name, size in SIZES.items()), stdout=io.StringIO())
+
+    def test_seed(self):
+        self.assertEqual(get_user_model().objects.bloggers().count(), 3)
+        self.assertEqual(Blog.objects.count(), 12)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertEqual(sum(Blog.objects.values_list('comment_count', flat=True)), 60)
+        # seeding again adds nothing
+        out = io.StringIO()
+        call_command('seed_benchmark', *(f'--{name}={size}' for name, size in SIZES.items()), stdout=out)
+        self.assertIn('Skipped 80 records', out.getvalue())
+        self.assertEqual(Comment.objects.count(), 60)
+
+    def test_run_and_compare_with_the_baseline(self):
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+            path = handle.name
+        self.addCleanup(os.remove, path)
+        out = io.StringIO()
+        call_command('benchmark', '--requests=6', '--concurrency=2', f'--save-baseline={path}', stdout=out)
+        with open(path) as handle:
+            baseline = json.load(handle)
+        self.assertEqual(set(baseline), {scenario.name for scenario in benchmark.scenarios()})
+        for summary in baseline.values():
+            self.assertEqual(summary['requests'], 6)
+            self.assertEqual(summary['errors'], 0)
+        self.assertEqual(baseline['blog:detail']['queries'], 2)
+
+        baseline['blog:detail']['queries'] = 1
+        with open(path, 'w') as handle:
+            json.dump(baseline, handle)
+        with self.assertRaisesMessage(CommandError, 'blog:detail: 2.0 queries, baseline 1.0'):
+            call_command('benchmark', '--requests=6', '--view=blog:detail', f'--baseline={path}', stdout=io.StringIO())
+
+    def test_session_stores(self):
+        out = io.StringIO()
+        call_command('benchmark_sessions', '--store=db', '--store=signed_cookies', stdout=out)
+        rows = dict(line.split(None, 1) for line in out.getvalue().splitlines() if line.startswith('total'))
+        self.assertIn('(5 session)', rows['total'])
+        self.assertIn('signed_cookies: 5 queries fewer than db', out.getvalue())
+        # the comment was rolled back
+        self.assertEqual(Comment.objects.count(), 60)
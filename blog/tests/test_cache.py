@@ -0,0 +1,182 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import SimpleTestCase, TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from blog.models import Blog, Comment
+from blog.tests.mixins import TestDataMixin
+from diy_blog.checks import page_cache_check
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'page-cache-tests'}}
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60, CACHES=LOCMEM)
+class PageCacheTest(TestDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.detail_url = self.blog1.get_absolute_url()
+        self.urls = {
+            'home': reverse('pages:home'),
+            'blogs': reverse('blog:blog'),
+            'detail': self.detail_url,
+            'other_detail': self.blog2.get_absolute_url(),
+            'bloggers': reverse('blog:bloggers'),
+            'blogger': reverse('blog:blogger', kwargs={'pk': self.user.pk}),
+            'other_blogger': reverse('blog:blogger', kwargs={'pk': self.user1.pk}),
+        }
+
+    def cached(self):
+        """Names of the pages that are served from the cache right now."""
+        hits = set()
+        for name, url in self.urls.items():
+            if self.client.get(url).wsgi_request.page_cache == 'hit':
+                hits.add(name)
+        return hits
+
+    def warm(self):
+        for url in self.urls.values():
+            self.client.get(url)
+
+    def test_second_request_is_a_hit(self):
+        first = self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.detail_url)
+        self.assertEqual(first.wsgi_request.page_cache, 'miss')
+        self.assertEqual(second.wsgi_request.page_cache, 'hit')
+        self.assertEqual(first.content, second.content)
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.get(self.detail_url)
+        client = Client()
+        client.login(username='commenter', password='12345')
+        response = client.get(self.detail_url)
+        self.assertFalse(hasattr(response.wsgi_request, 'page_cache'))
+        self.assertContains(response, 'commenter')
+
+    def test_comment_purges_its_blog_and_the_list(self):
+        self.warm()
+        Comment.objects.create(blog=self.blog1, content='fresh comment', user=self.commenter)
+        # the list shows comment counts
+        self.assertEqual(self.cached(), set(self.urls) - {'detail', 'blogs'})
+        self.assertContains(self.client.get(self.detail_url), 'fresh comment')
+
+    def test_blog_update_purges_list_detail_and_blogger(self):
+        self.warm()
+        self.blog1.content = 'changed'
+        self.blog1.save()
+        self.assertEqual(self.cached(), {'home', 'other_detail', 'bloggers', 'other_blogger'})
+
+    def test_blog_rename_purges_old_slug(self):
+        self.warm()
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.title = 'renamed'
+        blog.save()
+        response = self.client.get(self.detail_url)
+        self.assertRedirects(response, blog.get_absolute_url(), status_code=301)
+
+    def test_blog_delete(self):
+        self.warm()
+        self.blog2.delete()
+        self.assertNotIn('blogs', self.cached())
+        self.assertEqual(self.client.get(self.urls['other_detail']).status_code, 404)
+
+    def test_bio_change_purges_blogger_pages(self):
+        self.warm()
+        self.user.bio = 'a new bio'
+        self.user.save()
+        self.assertEqual(self.cached(), {'home', 'blogs', 'detail', 'other_detail', 'other_blogger'})
+        self.assertContains(self.client.get(self.urls['blogger']), 'a new bio')
+
+    def test_rename_purges_pages_showing_the_name(self):
+        self.warm()
+        # scrubby wrote five posts and commented on blog post2
+        user = get_user_model().objects.get(pk=self.user1.pk)
+        user.username = 'scrubbed'
+        user.save()
+        self.assertEqual(self.cached(), {'home', 'detail', 'blogger'})
+        self.assertContains(self.client.get(self.urls['other_detail']), 'scrubbed')
+
+    def test_login_does_not_purge(self):
+        self.warm()
+        Client().login(username='testuser', password='12345')
+        self.assertEqual(self.cached(), set(self.urls))
+
+    def test_losing_blogger_permission(self):
+        self.warm()
+        permission = Permission.objects.get(codename='blogger', content_type__app_label='blog')
+        self.user1.user_permissions.remove(permission)
+        self.assertEqual(self.client.get(self.urls['other_blogger']).status_code, 404)
+        self.assertIn('blogger', self.cached())
+
+    def test_pending_message_skips_cache(self):
+        self.client.get(self.detail_url)
+        storage = CookieStorage(RequestFactory().get('/'))
+        self.client.cookies[storage.cookie_name] = storage._encode([Message(constants.INFO, 'Signed out.')])
+        response = self.client.get(self.detail_url)
+        self.assertFalse(hasattr(response.wsgi_request, 'page_cache'))
+        self.assertContains(response, 'Signed out.')
+        self.assertNotContains(self.client.get(self.detail_url), 'Signed out.')
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'diy-blog-page-cache-tests'),
+}})
+class FileBasedPageCacheTest(PageCacheTest):
+    def test_backend(self):
+        self.assertIsInstance(caches['default'], FileBasedCache)
+
+
+@override_settings(CACHES=LOCMEM)
+class CommentFragmentCacheTest(TestDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.comment = self.blog1.comments.get(user=self.commenter)
+        self.url = self.blog1.get_absolute_url()
+
+    def test_body_served_from_fragment_cache(self):
+        self.client.get(self.url)
+        # bypasses save(), so updated_at and the fragment key stay the same
+        Comment.objects.filter(pk=self.comment.pk).update(content='changed behind the cache')
+        self.assertNotContains(self.client.get(self.url), 'changed behind the cache')
+
+    def test_edit_invalidates_fragment(self):
+        self.client.get(self.url)
+        self.comment.content = 'edited comment'
+        self.comment.save()
+        self.assertContains(self.client.get(self.url), 'edited comment')
+
+    def test_controls_rendered_per_viewer(self):
+        update_url = reverse('blog:update_comment', kwargs={'pk': self.comment.pk})
+        self.assertNotContains(self.client.get(self.url), update_url)
+
+        owner = Client()
+        owner.login(username='commenter', password='12345')
+        self.assertContains(owner.get(self.url), update_url)
+
+        other = Client()
+        other.login(username='scrubby', password='12345')
+        self.assertNotContains(other.get(self.url), update_url)
+
+
+class PageCacheCheckTest(SimpleTestCase):
+    @override_settings(PAGE_CACHE_TIMEOUT=60, CACHES=LOCMEM)
+    def test_page_cache_on_a_local_cache(self):
+        self.assertEqual([error.id for error in page_cache_check(None)], ['diy_blog.W001'])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': '127.0.0.1:11211'}})
+    def test_page_cache_on_a_shared_cache(self):
+        self.assertEqual(page_cache_check(None), [])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0, CACHES=LOCMEM)
+    def test_page_cache_off(self):
+        self.assertEqual(page_cache_check(None), [])
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from blog.models import Blog, Comment
+from blog.tests.mixins import TestDataMixin
+
+
+class ConditionalGetTest(TestDataMixin, TestCase):
+    def setUp(self):
+        self.detail_url = self.blog1.get_absolute_url()
+        self.list_url = reverse('blog:blog')
+        self.blogger_url = reverse('blog:blogger', kwargs={'pk': self.user.pk})
+
+    def revalidate(self, url, response, client=None):
+        client = client or self.client
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_detail_not_modified(self):
+        response = self.client.get(self.detail_url)
+        again = self.revalidate(self.detail_url, response)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertTemplateNotUsed(again, 'blog/detail.html')
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        # a deleted comment would leave the newest timestamp where it was
+        response = self.client.get(self.detail_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.blog1.comments.all().delete()
+        again = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(again.status_code, 200)
+        again = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(again.status_code, 200)
+
+    def test_new_comment_changes_detail(self):
+        response = self.client.get(self.detail_url)
+        Comment.objects.create(blog=self.blog1, content='new', user=self.user1)
+        self.assertEqual(self.revalidate(self.detail_url, response).status_code, 200)
+
+    def test_deleted_comment_changes_detail(self):
+        response = self.client.get(self.detail_url)
+        self.blog1.comments.all().delete()
+        self.assertEqual(self.revalidate(self.detail_url, response).status_code, 200)
+
+    def test_list_not_modified_until_a_post_changes(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(self.revalidate(self.list_url, response).status_code, 304)
+        Blog.objects.create(blogger=self.user, content='x', title='newest post')
+        self.assertEqual(self.revalidate(self.list_url, response).status_code, 200)
+
+    def test_blogger_bio_changes_etag(self):
+        response = self.client.get(self.blogger_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.revalidate(self.blogger_url, response).status_code, 304)
+        self.user.bio = 'a different bio'
+        self.user.save()
+        self.assertEqual(self.revalidate(self.blogger_url, response).status_code, 200)
+
+    def test_etag_differs_per_reader(self):
+        anonymous = self.client.get(self.detail_url)
+        client = Client()
+        client.login(username='commenter', password='12345')
+        self.assertEqual(self.revalidate(self.detail_url, anonymous, client).status_code, 200)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_page_cache_hit_not_modified(self):
+        cache.clear()
+        response = self.client.get(self.detail_url)
+        again = self.revalidate(self.detail_url, response)
+        self.assertEqual(again.wsgi_request.page_cache, 'hit')
+        self.assertEqual(again.status_code, 304)
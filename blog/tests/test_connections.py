@@ -0,0 +1,84 @@
+import sqlite3
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from diy_blog.db import pool
+from diy_blog.db.pool import ConnectionPool
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        pool.reset_metrics()
+        self.pool = ConnectionPool('test', size=2)
+
+    def connect(self):
+        connection = sqlite3.connect(':memory:')
+        self.pool.add(connection)
+        return connection
+
+    def test_hands_back_released_connections(self):
+        self.assertIsNone(self.pool.acquire())
+        connection = self.connect()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+        self.assertEqual(pool.metrics()['test'], {'pooled': 1})
+
+    def test_closes_connections_over_the_size(self):
+        connections = [self.connect() for _ in range(3)]
+        for connection in connections:
+            self.pool.release(connection)
+        self.assertEqual(len(self.pool), 2)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connections[2].execute('SELECT 1')
+
+    def test_discards_old_connections(self):
+        self.pool.max_age = 0
+        self.pool.release(self.connect())
+        self.assertIsNone(self.pool.acquire())
+        self.assertEqual(pool.metrics()['test'], {'discarded': 1})
+
+    def test_discards_connections_that_fail_the_check(self):
+        self.pool.release(self.connect())
+        self.assertIsNone(self.pool.acquire(check=lambda connection: False))
+        self.assertEqual(pool.metrics()['test'], {'unusable': 1})
+
+
+class HealthCheckTest(TransactionTestCase):
+    # checks are skipped inside a transaction, which TestCase always holds open
+    def setUp(self):
+        pool.reset_metrics()
+
+    def start_request(self):
+        # what the request_started signal does for every connection
+        connection.close_if_unusable_or_obsolete()
+
+    def test_kept_connection_is_checked_once_per_request(self):
+        self.start_request()
+        with mock.patch.object(connection, 'is_usable', return_value=True) as is_usable:
+            get_user_model().objects.count()
+            get_user_model().objects.count()
+        self.assertEqual(is_usable.call_count, 1)
+        self.assertEqual(pool.metrics()['default'], {'reused': 1})
+
+    def test_dropped_connection_is_replaced(self):
+        self.start_request()
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            get_user_model().objects.count()
+        close.assert_called_once_with()
+        self.assertEqual(pool.metrics()['default'], {'unusable': 1})
+
+
+class DatabaseMetricsViewTest(TestCase):
+    def test_metrics_are_staff_only(self):
+        url = reverse('db_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        get_user_model().objects.create_superuser(username='admin', email='a@example.com', password='12345')
+        self.client.login(username='admin', password='12345')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'connections', 'idle_pooled'})
@@ -0,0 +1,74 @@
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.feeds import BlogFeedView
+from blog.models import Blog
+from blog.tests.mixins import TestDataMixin
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'feed-tests'}}
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(CACHES=LOCMEM)
+class FeedTest(TestDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def fetch(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, ElementTree.fromstring(b''.join(response.streaming_content))
+
+    def test_rss_lists_every_post_newest_first(self):
+        response, root = self.fetch(reverse('blog:feed', args=['rss']))
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        titles = [item.find('title').text for item in root.iter('item')]
+        self.assertEqual(titles, list(Blog.objects.values_list('title', flat=True)))
+
+    def test_atom(self):
+        response, root = self.fetch(reverse('blog:feed', args=['atom']))
+        self.assertTrue(response['Content-Type'].startswith('application/atom+xml'))
+        self.assertEqual(len(root.findall(f'{ATOM}entry')), Blog.objects.count())
+
+    def test_blogger_feed_only_has_their_posts(self):
+        _, root = self.fetch(reverse('blog:blogger_feed', args=[self.user.pk, 'rss']))
+        titles = {item.find('title').text for item in root.iter('item')}
+        self.assertEqual(titles, {self.blog1.title, self.blog2.title})
+
+    def test_not_found(self):
+        self.assertEqual(self.client.get(reverse('blog:feed', args=['json'])).status_code, 404)
+        url = reverse('blog:blogger_feed', args=[self.commenter.pk, 'rss'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_conditional_get(self):
+        url = reverse('blog:feed', args=['rss'])
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        Blog.objects.create(blogger=self.user, title='new post', content='x')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_deleting_the_newest_post_changes_the_etag(self):
+        url = reverse('blog:feed', args=['rss'])
+        etag = self.client.get(url)['ETag']
+        Blog.objects.order_by('-updated_at').first().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_only_changed_entries_are_rendered(self):
+        url = reverse('blog:feed', args=['rss'])
+        with mock.patch.object(BlogFeedView, 'render_entry', autospec=True,
+                               side_effect=BlogFeedView.render_entry) as render_entry:
+            self.fetch(url)
+            self.assertEqual(render_entry.call_count, Blog.objects.count())
+
+            render_entry.reset_mock()
+            Blog.objects.create(blogger=self.user, title='new post', content='x')
+            _, root = self.fetch(url)
+            self.assertEqual(render_entry.call_count, 1)
+            self.assertEqual(next(root.iter('item')).find('title').text, 'new post')
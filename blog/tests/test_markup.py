@@ -0,0 +1,67 @@
+import io
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from blog.markup import render
+from blog.models import Blog, Comment
+from blog.tests.mixins import TestDataMixin
+
+
+class RenderTest(SimpleTestCase):
+    def test_blocks(self):
+        self.assertEqual(render('# Plan\n\nfirst\nsecond\n\n- a\n- b\n\n1. c\n\n> said'), (
+            '<h2>Plan</h2>\n<p>first<br>second</p>\n<ul><li>a</li><li>b</li></ul>\n'
+            '<ol><li>c</li></ol>\n<blockquote><p>said</p></blockquote>'))
+
+    def test_inline(self):
+        self.assertEqual(
+            render('**glue** then *clamp* with `a*b*` [docs](https://example.com/a*b*)'),
+            '<p><strong>glue</strong> then <em>clamp</em> with <code>a*b*</code> '
+            '<a href="https://example.com/a*b*" rel="nofollow ugc">docs</a></p>')
+
+    def test_code_block_is_literal(self):
+        self.assertEqual(render('```\n**x** <b>\n```'), '<pre><code>**x** &lt;b&gt;</code></pre>')
+
+    def test_html_is_escaped(self):
+        self.assertEqual(render('<script>alert(1)</script>'), '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+
+    def test_unsafe_links_stay_text(self):
+        for source in ('[x](javascript:alert(1))', '[x](//evil.example)', '[x](/\\evil.example)', '[x](" onclick="a)'):
+            self.assertNotIn('<a', render(source))
+        self.assertIn('href="/blog/blogs/"', render('[x](/blog/blogs/)'))
+
+    def test_plain_text_is_unchanged(self):
+        self.assertEqual(render('2*3*4 and snake_case'), '<p>2*3*4 and snake_case</p>')
+        self.assertEqual(render(''), '')
+
+
+class RenderedContentTest(TestDataMixin, TestCase):
+    def test_rendered_on_save(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.content = 'a **bold** post'
+        blog.save()
+        self.assertEqual(Blog.objects.get(pk=blog.pk).content_html, '<p>a <strong>bold</strong> post</p>')
+
+        blog.content = '*changed*'
+        blog.save(update_fields=['content'])
+        self.assertEqual(Blog.objects.get(pk=blog.pk).content_html, '<p><em>changed</em></p>')
+
+    def test_rendered_by_bulk_create(self):
+        Comment.objects.bulk_create([Comment(blog=self.blog1, user=self.commenter, content='*hi*')])
+        self.assertEqual(Comment.objects.latest('pk').content_html, '<p><em>hi</em></p>')
+
+    def test_pages_show_the_html(self):
+        blog = Blog.objects.create(blogger=self.user, title='markup', content='**strong** <i>')
+        Comment.objects.create(blog=blog, user=self.commenter, content='*nice*')
+        response = self.client.get(blog.get_absolute_url())
+        self.assertContains(response, '<strong>strong</strong> &lt;i&gt;')
+        self.assertContains(response, '<em>nice</em>')
+
+    def test_render_content_command(self):
+        Blog.objects.filter(pk=self.blog1.pk).update(content='**stale**', content_html='')
+        out = io.StringIO()
+        call_command('render_content', stdout=out)
+        self.assertIn('Rendered 1 blogs again.', out.getvalue())
+        self.assertIn('Rendered 0 comments again.', out.getvalue())
+        self.assertEqual(Blog.objects.get(pk=self.blog1.pk).content_html, '<p><strong>stale</strong></p>')
@@ -1,8 +1,11 @@
+import io
+
+from django.core.management import call_command
 from django.test import TestCase
 from .mixins import TestDataMixin
 from django.utils.text import slugify
 
-from blog.models import Blog, Comment
+from blog.models import Blog, BlogSlugRedirect, Comment
 
 
 class TestBlogModel(TestDataMixin, TestCase):
@@ -31,6 +34,52 @@ class TestBlogModel(TestDataMixin, TestCase):
         self.assertEqual(url, self.blog.get_absolute_url())
 
 
+class TestBlogSlug(TestDataMixin, TestCase):
+    def test_duplicate_titles_get_unique_slugs(self):
+        slugs = list(self.user1.blogs.order_by('created_at').values_list('slug', flat=True))
+        base = slugify('y'*64)
+        self.assertEqual(slugs, [base, f'{base}-2', f'{base}-3', f'{base}-4', f'{base}-5'])
+
+    def test_reserved_slug_is_skipped(self):
+        blog = Blog.objects.create(blogger=self.user, content='x', title='Bloggers')
+        self.assertEqual(blog.slug, 'bloggers-2')
+
+    def test_empty_slug_falls_back(self):
+        blog = Blog.objects.create(blogger=self.user, content='x', title='!!!')
+        self.assertEqual(blog.slug, 'blog')
+
+    def test_slug_kept_when_title_unchanged(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.content = 'new content'
+        blog.save()
+        self.assertEqual(blog.slug, self.blog1.slug)
+        self.assertFalse(BlogSlugRedirect.objects.exists())
+
+    def test_rename_leaves_redirect(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.title = 'a new title'
+        blog.save()
+        self.assertEqual(blog.slug, 'a-new-title')
+        redirect = BlogSlugRedirect.objects.get(old_slug=self.blog1.slug)
+        self.assertEqual(redirect.blog, blog)
+
+    def test_old_slug_not_reused(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.title = 'a new title'
+        blog.save()
+        other = Blog.objects.create(blogger=self.user, content='x', title=self.blog1.title)
+        self.assertEqual(other.slug, f'{self.blog1.slug}-2')
+
+    def test_rename_back_reclaims_slug(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.title = 'a new title'
+        blog.save()
+        blog.title = self.blog1.title
+        blog.save()
+        self.assertEqual(blog.slug, self.blog1.slug)
+        self.assertEqual(list(BlogSlugRedirect.objects.values_list('old_slug', flat=True)), ['a-new-title'])
+
+
 class TestCommentModel(TestDataMixin, TestCase):
     def setUp(self):
         self.comment = Comment.objects.create(user=self.commenter, content='y'*256, blog=self.blog1)
@@ -51,3 +100,62 @@ class TestCommentModel(TestDataMixin, TestCase):
         content = 'Z'*25
         self.comment.content = content
         self.assertEqual(content, str(self.comment))
+
+
+class TestCommentStats(TestDataMixin, TestCase):
+    def stats(self, blog):
+        return Blog.objects.values_list('comment_count', 'last_comment_at').get(pk=blog.pk)
+
+    def test_backfilled_by_test_data(self):
+        latest = self.blog1.comments.latest('created_at')
+        self.assertEqual(self.stats(self.blog1), (1, latest.created_at))
+        self.assertEqual(self.stats(Blog.objects.filter(blogger=self.user1).first()), (0, None))
+
+    def test_create_and_delete(self):
+        first = self.blog1.comments.get()
+        comment = Comment.objects.create(user=self.commenter, content='y', blog=self.blog1)
+        self.assertEqual(self.stats(self.blog1), (2, comment.created_at))
+
+        comment.delete()
+        self.assertEqual(self.stats(self.blog1), (1, first.created_at))
+        first.delete()
+        self.assertEqual(self.stats(self.blog1), (0, None))
+
+    def test_queryset_delete(self):
+        Comment.objects.create(user=self.commenter, content='y', blog=self.blog1)
+        Comment.objects.filter(blog=self.blog1).delete()
+        self.assertEqual(self.stats(self.blog1), (0, None))
+
+    def test_bulk_create(self):
+        with self.assertNumQueries(3):
+            comments = Comment.objects.bulk_create(
+                [Comment(user=self.commenter, content='y', blog=self.blog2) for _ in range(3)]
+                + [Comment(user=self.commenter, content='y', blog=self.blog1)])
+        self.assertEqual(self.stats(self.blog2), (4, comments[2].created_at))
+        self.assertEqual(self.stats(self.blog1), (2, comments[3].created_at))
+
+    def test_moving_a_comment_recounts_both_posts(self):
+        comment = self.blog1.comments.get()
+        comment.blog = self.blog2
+        comment.save()
+        self.assertEqual(self.stats(self.blog1), (0, None))
+        self.assertEqual(self.stats(self.blog2)[0], 2)
+
+    def test_editing_keeps_count(self):
+        comment = self.blog1.comments.get()
+        comment.content = 'edited'
+        comment.save()
+        self.assertEqual(self.stats(self.blog1)[0], 1)
+
+    def test_saving_blog_keeps_stats(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        Comment.objects.create(user=self.commenter, content='y', blog=self.blog1)
+        blog.title = 'renamed'
+        blog.save()
+        self.assertEqual(self.stats(self.blog1)[0], 2)
+
+    def test_repair_command(self):
+        Blog.objects.update(comment_count=42, last_comment_at=None)
+        call_command('repair_comment_stats', '--batch-size', '2', stdout=io.StringIO())
+        self.assertEqual(self.stats(self.blog1), (1, self.blog1.comments.get().created_at))
+        self.assertEqual(Blog.objects.filter(comment_count=0).count(), Blog.objects.count() - 2)
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Blog, Comment
+from blog.pagination import InvalidCursor, KeysetPaginator
+from blog.tests.mixins import TestDataMixin
+from blog.views import BloggerDetailView, BloggerListView
+
+
+class KeysetPaginatorTest(TestDataMixin, TestCase):
+    def setUp(self):
+        # several comments share a timestamp so the id has to break ties
+        now = timezone.now()
+        for i in range(7):
+            comment = Comment.objects.create(blog=self.blog1, content=str(i), user=self.commenter)
+            Comment.objects.filter(pk=comment.pk).update(created_at=now + timedelta(seconds=i // 3))
+        self.queryset = Comment.objects.filter(blog=self.blog1)
+
+    def walk(self, ordering):
+        paginator = KeysetPaginator(self.queryset, 3, ordering)
+        page, seen = paginator.page(), []
+        while True:
+            seen.extend(page)
+            if not page.has_next():
+                return seen
+            page = paginator.page(page.next_cursor)
+
+    def test_ascending_walk_matches_ordering(self):
+        expected = list(self.queryset.order_by('created_at', 'id'))
+        self.assertEqual(self.walk(('created_at', 'id')), expected)
+
+    def test_descending_walk_matches_ordering(self):
+        expected = list(self.queryset.order_by('-created_at', 'id'))
+        self.assertEqual(self.walk(('-created_at', 'id')), expected)
+
+    def test_bad_cursor(self):
+        paginator = KeysetPaginator(self.queryset, 3, ('created_at', 'id'))
+        for cursor in ('garbage', 'WzFd', 'WyJ4IiwxXQ'):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+
+class BloggerPagesTest(TestDataMixin, TestCase):
+    def test_directory_is_annotated(self):
+        response = self.client.get(reverse('blog:bloggers'))
+        bloggers = {blogger.username: blogger for blogger in response.context['bloggers']}
+        self.assertEqual(bloggers['testuser'].post_count, 2)
+        self.assertEqual(bloggers['scrubby'].post_count, 5)
+        self.assertEqual(bloggers['clark_kent'].post_count, 0)
+        self.assertIsNone(bloggers['clark_kent'].latest_post_at)
+        self.assertEqual(bloggers['testuser'].latest_post_at, self.blog2.created_at)
+        self.assertContains(response, '5 posts')
+
+    def test_directory_pages(self):
+        view = BloggerListView
+        self.addCleanup(setattr, view, 'paginate_by', view.paginate_by)
+        view.paginate_by = 2
+        response = self.client.get(reverse('blog:bloggers'))
+        self.assertEqual([blogger.username for blogger in response.context['bloggers']], ['clark_kent', 'scrubby'])
+        response = self.client.get(reverse('blog:bloggers'), {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual([blogger.username for blogger in response.context['bloggers']], ['testuser'])
+
+    def test_blogger_posts_are_paginated(self):
+        view = BloggerDetailView
+        self.addCleanup(setattr, view, 'blogs_per_page', view.blogs_per_page)
+        view.blogs_per_page = 3
+        url = reverse('blog:blogger', kwargs={'pk': self.user1.pk})
+        expected = list(self.user1.blogs.order_by('-created_at', 'id'))
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['blogs']), expected[:3])
+        self.assertContains(response, '?cursor=')
+        response = self.client.get(url, {'cursor': response.context['blogs'].next_cursor})
+        self.assertEqual(list(response.context['blogs']), expected[3:])
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, 404)
+
+    def test_new_post_purges_the_directory(self):
+        with self.settings(PAGE_CACHE_TIMEOUT=60):
+            self.client.get(reverse('blog:bloggers'))
+            Blog.objects.create(blogger=self.user, title='another', content='x')
+            self.assertContains(self.client.get(reverse('blog:bloggers')), '3 posts')
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Blog
+from diy_blog import profiling
+
+
+class HistogramTest(SimpleTestCase):
+    def test_cumulative_buckets(self):
+        histogram = profiling.Histogram((1, 5))
+        for value in (0, 1, 3, 9):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1, 2), (5, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.as_dict(), {'count': 4, 'sum': 13, 'buckets': {'1': 2, '5': 3, '+Inf': 4}})
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='profiled', password='12345')
+        cls.blog = Blog.objects.create(blogger=cls.user, title='profiled post', content='x')
+
+    def setUp(self):
+        profiling.reset()
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_profiles_per_url_name(self):
+        self.client.get(reverse('blog:detail', kwargs={'slug': self.blog.slug}))
+        self.client.get(reverse('blog:detail', kwargs={'slug': self.blog.slug}))
+        self.client.get('/no-such-page/')
+        views = profiling.snapshot()
+        self.assertEqual(set(views), {'blog:detail', 'unresolved'})
+        detail = views['blog:detail']
+        self.assertEqual(detail['request_seconds']['count'], 2)
+        self.assertGreater(detail['db_queries']['sum'], 0)
+        self.assertGreater(detail['db_seconds']['sum'], 0)
+        self.assertGreater(detail['template_seconds']['sum'], 0)
+        self.assertEqual(detail['page_cache'], {'none': 2})
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PAGE_CACHE_TIMEOUT=60)
+    def test_page_cache_results(self):
+        self.client.get(reverse('blog:blog'))
+        self.client.get(reverse('blog:blog'))
+        self.assertEqual(profiling.snapshot()['blog:blog']['page_cache'], {'miss': 1, 'hit': 1})
+
+    def test_unsampled_requests_are_left_out(self):
+        self.client.get(reverse('blog:blog'))
+        self.assertEqual(profiling.snapshot(), {})
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, METRICS_TOKEN='secret')
+class MetricsViewTest(TestCase):
+    def setUp(self):
+        profiling.reset()
+
+    def test_staff_json(self):
+        url = reverse('request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = get_user_model().objects.create_user(username='staff', password='12345', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse('blog:bloggers'))
+        data = self.client.get(url).json()
+        self.assertEqual(data['views']['blog:bloggers']['request_seconds']['count'], 1)
+
+    def test_prometheus_needs_the_token(self):
+        url = reverse('prometheus_metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.client.get(reverse('blog:bloggers'))
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('# TYPE diy_blog_request_seconds histogram', text)
+        self.assertIn('diy_blog_request_seconds_bucket{view="blog:bloggers",le="+Inf"} 1', text)
+        self.assertIn('diy_blog_page_cache_total{view="blog:bloggers",result="none"} 1', text)
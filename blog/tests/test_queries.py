@@ -0,0 +1,110 @@
+from django.db import connection
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.tests.mixins import TestDataMixin, QueryBudgetMixin
+from blog.models import Blog, Comment
+from diy_blog.guards import DeferredFieldLoaded
+from diy_blog.middleware import DeferredLoadGuardMiddleware
+from jobs.models import Job
+
+
+class BlogQueryBudgetTest(QueryBudgetMixin, TestDataMixin, TestCase):
+    # session, user and the two permission lookups for a logged in reader
+    AUTH_QUERIES = 4
+
+    def authenticated_client(self):
+        client = Client()
+        client.login(username='commenter', password='12345')
+        return client
+
+    def add_comments(self, count):
+        users = [self.user, self.user1, self.commenter]
+        for i in range(count):
+            Comment.objects.create(blog=self.blog1, content='z'*32, user=users[i % len(users)])
+
+    def test_home(self):
+        self.assertQueryBudget(0, reverse('pages:home'))
+
+    def test_blog_list(self):
+        self.assertQueryBudget(1, reverse('blog:blog'))
+
+    def test_blog_detail(self):
+        self.assertQueryBudget(2, self.blog1.get_absolute_url())
+
+    def test_blog_detail_authenticated(self):
+        self.assertQueryBudget(2 + self.AUTH_QUERIES, self.blog1.get_absolute_url(), self.authenticated_client())
+
+    def test_blog_detail_does_not_grow_with_comments(self):
+        self.add_comments(12)
+        response = self.assertQueryBudget(2, self.blog1.get_absolute_url())
+        self.assertContains(response, 'scrubby')
+
+    def test_bloggers(self):
+        self.assertQueryBudget(1, reverse('blog:bloggers'))
+
+    def test_blogger_detail(self):
+        self.assertQueryBudget(2, reverse('blog:blogger', kwargs={'pk': self.user.pk}))
+
+    def test_comment_form(self):
+        url = reverse('blog:create_comment', kwargs={'slug': self.blog1.slug})
+        self.assertQueryBudget(self.AUTH_QUERIES, url, self.authenticated_client())
+
+    def test_comment_update_form(self):
+        comment = self.blog1.comments.get(user=self.commenter)
+        url = reverse('blog:update_comment', kwargs={'pk': comment.pk})
+        self.assertQueryBudget(1 + self.AUTH_QUERIES, url, self.authenticated_client())
+
+    @override_settings(JOBS_EAGER=False)
+    def test_comment_update(self):
+        comment = self.blog1.comments.get(user=self.commenter)
+        url = reverse('blog:update_comment', kwargs={'pk': comment.pk})
+        client = self.authenticated_client()
+        with self.assertNumQueries(7):
+            response = client.post(url, {'content': 'an edited comment'})
+        self.assertRedirects(response, self.blog1.get_absolute_url(), fetch_redirect_response=False)
+        # reindexing the comment is left to a worker
+        self.assertEqual(Job.objects.get().name, 'blog.search.reindex_comment')
+
+    def test_comment_delete(self):
+        comment = self.blog1.comments.get(user=self.commenter)
+        url = reverse('blog:delete_comment', kwargs={'pk': comment.pk})
+        client = self.authenticated_client()
+        with self.assertNumQueries(6):
+            client.post(url)
+
+
+class ColumnProjectionTest(TestDataMixin, TestCase):
+    def selected_columns(self, url, client=None):
+        with CaptureQueriesContext(connection) as context:
+            (client or self.client).get(url)
+        return '\n'.join(query['sql'] for query in context.captured_queries if 'FROM "blog_blog"' in query['sql'])
+
+    def test_lists_leave_out_post_bodies(self):
+        client = Client()
+        client.force_login(self.user)
+        for url, client in ((reverse('blog:blog'), None),
+                            (reverse('blog:blogger', kwargs={'pk': self.user.pk}), None),
+                            (reverse('dashboard:index'), client)):
+            sql = self.selected_columns(url, client)
+            self.assertIn('"blog_blog"."title"', sql)
+            self.assertNotIn('"blog_blog"."content', sql)
+
+    def test_template_loading_a_deferred_field_raises(self):
+        request = RequestFactory().get('/')
+        blog = Blog.objects.for_listing().get(pk=self.blog1.pk)
+        template = engines['django'].from_string('{{ blog.content }}')
+
+        def get_response(request):
+            # the handler renders template responses inside the middleware chain
+            response = TemplateResponse(request, template, {'blog': blog})
+            return middleware.process_template_response(request, response).render()
+
+        middleware = DeferredLoadGuardMiddleware(get_response)
+        with self.assertRaisesMessage(DeferredFieldLoaded, 'Blog.content was deferred'):
+            middleware(request)
+        # loading outside a render is still allowed
+        self.assertEqual(blog.content, 'x' * 128)
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import users.models
+from blog.models import Blog, Comment
+from diy_blog.routers import ReplicaRouter, replica_reads
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'replica-tests'}}
+
+
+class ReplicaRouterTest(TestCase):
+    def test_primary_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(ReplicaRouter().db_for_read(Blog), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_primary_unless_switched_on(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Blog), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_primary_inside_a_transaction(self):
+        # TestCase keeps a transaction open on the primary
+        with replica_reads():
+            self.assertEqual(ReplicaRouter().db_for_read(Blog), 'default')
+
+    def test_writes_and_migrations_stay_on_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Blog), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'blog'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaReadsTest(TransactionTestCase):
+    # the replica mirrors the primary's test database, which only shows
+    # committed rows, hence a TransactionTestCase
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        # flushing between tests recreates the permissions with new ids
+        users.models._blogger_permission_id = None
+        self.user = get_user_model().objects.create_user(username='reader', password='12345')
+        self.blog = Blog.objects.create(blogger=self.user, title='replicated', content='x')
+
+    def queries(self, method, url, client=None, **data):
+        client = client or self.client
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(url, data)
+        return response, len(primary), len(replica)
+
+    def test_anonymous_pages_read_from_replica(self):
+        replica_reads = 0
+        for url in (reverse('blog:blog'), self.blog.get_absolute_url(), reverse('pages:home')):
+            response, primary, replica = self.queries('get', url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(primary, 0, url)
+            replica_reads += replica
+        self.assertGreater(replica_reads, 0)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60, CACHES=LOCMEM)
+    def test_page_cache_misses_read_from_primary(self):
+        cache.clear()
+        url = self.blog.get_absolute_url()
+        response, primary, replica = self.queries('get', url)
+        self.assertEqual(response.wsgi_request.page_cache, 'miss')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+        response, primary, replica = self.queries('get', url)
+        self.assertEqual(response.wsgi_request.page_cache, 'hit')
+        self.assertEqual((primary, replica), (0, 0))
+
+    def test_other_apps_read_from_primary(self):
+        self.client.login(username='reader', password='12345')
+        _, primary, replica = self.queries('get', reverse('dashboard:index'))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_reader_is_pinned_to_primary_after_writing(self):
+        self.client.login(username='reader', password='12345')
+        url = reverse('blog:create_comment', kwargs={'slug': self.blog.slug})
+        response, _, replica = self.queries('post', url, content='a comment')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(replica, 0)
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+        response, primary, replica = self.queries('get', self.blog.get_absolute_url())
+        self.assertContains(response, 'a comment')
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+        # once the cookie expires, reads go back to the replica
+        del self.client.cookies[settings.REPLICA_STICKY_COOKIE]
+        _, primary, replica = self.queries('get', self.blog.get_absolute_url())
+        self.assertEqual(primary, 0)
+        self.assertTrue(Comment.objects.filter(blog=self.blog).exists())
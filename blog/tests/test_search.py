@@ -0,0 +1,78 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Blog, Comment, SearchEntry
+from blog.search import search_blogs, tokenize
+from blog.tests.mixins import QueryBudgetMixin, TestDataMixin
+
+
+class TokenizeTest(TestCase):
+    def test_lowercases_and_drops_stop_words(self):
+        self.assertEqual(tokenize('The Quick, brown FOX is a fox!'), ['quick', 'brown', 'fox', 'fox'])
+
+
+class SearchTest(QueryBudgetMixin, TestDataMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.title_match = Blog.objects.create(
+            blogger=cls.user, title='Sourdough starter', content='Feed it flour and water.')
+        cls.content_match = Blog.objects.create(
+            blogger=cls.user, title='Weekend baking', content='My sourdough came out flat.')
+        cls.comment_match = Blog.objects.create(
+            blogger=cls.user1, title='Kitchen tools', content='A good knife matters.')
+        cls.comment = Comment.objects.create(
+            blog=cls.comment_match, user=cls.commenter, content='Use it on sourdough loaves.')
+
+    def test_ranks_title_over_content_over_comments(self):
+        self.assertEqual(search_blogs('sourdough'), [self.title_match, self.content_match, self.comment_match])
+
+    def test_posts_matching_more_words_rank_first(self):
+        self.assertEqual(search_blogs('sourdough flat')[0], self.content_match)
+
+    def test_edit_replaces_old_terms(self):
+        blog = Blog.objects.get(pk=self.title_match.pk)
+        blog.title = 'Rye starter'
+        blog.save()
+        self.assertNotIn(blog, search_blogs('sourdough'))
+        self.assertEqual(search_blogs('rye'), [blog])
+
+    def test_deleting_comment_removes_its_terms(self):
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertNotIn(self.comment_match, search_blogs('loaves'))
+        self.assertTrue(SearchEntry.objects.filter(blog=self.comment_match).exists())
+
+    def test_deleting_blog_removes_its_terms(self):
+        Blog.objects.get(pk=self.title_match.pk).delete()
+        self.assertFalse(SearchEntry.objects.filter(term='starter').exists())
+
+    @override_settings(SEARCH_INCLUDE_COMMENTS=False)
+    def test_comments_can_be_left_out(self):
+        Comment.objects.create(blog=self.blog1, user=self.commenter, content='pumpernickel')
+        self.assertEqual(search_blogs('pumpernickel'), [])
+
+    def test_rebuild_command(self):
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(search_blogs('sourdough'), [self.title_match, self.content_match, self.comment_match])
+
+    def test_view(self):
+        response = self.client.get(reverse('blog:search'), {'q': 'knife'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'blog/search.html')
+        self.assertEqual(response.context['blogs'], [self.comment_match])
+
+    def test_view_without_query(self):
+        response = self.client.get(reverse('blog:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['blogs'], [])
+
+    def test_view_query_budget(self):
+        self.assertQueryBudget(2, reverse('blog:search') + '?q=sourdough+starter')
+
+    def test_search_slug_is_reserved(self):
+        blog = Blog.objects.create(blogger=self.user, title='Search', content='x')
+        self.assertNotEqual(blog.slug, 'search')
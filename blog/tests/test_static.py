@@ -0,0 +1,63 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+
+class StaticFilesTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.mkdir(os.path.join(self.source, 'css'))
+        self.write('css/site.css', 'body { color: #333; }\n' * 50)
+        self.write('css/print.css', 'body { color: #000; }\n' * 50)
+        settings = override_settings(
+            STATIC_ROOT=self.root, STATICFILES_DIRS=[self.source], STATIC_COMPRESS_WORKERS=2,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, name, content):
+        with open(os.path.join(self.source, name), 'w') as handle:
+            handle.write(content)
+
+    def collect(self):
+        call_command('collectstatic', '--noinput', stdout=io.StringIO())
+        return {name: os.stat(os.path.join(self.root, 'css', name)).st_ctime_ns
+                for name in os.listdir(os.path.join(self.root, 'css')) if name.endswith('.gz')}
+
+    def test_compresses_only_changed_files(self):
+        first = self.collect()
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        self.assertEqual(len(first), 4)
+        self.assertIn(os.path.basename(hashed) + '.gz', first)
+
+        self.write('css/site.css', 'body { color: #444; }\n' * 50)
+        os.utime(os.path.join(self.source, 'css/site.css'), (0, os.stat(self.root).st_mtime + 10))
+        second = self.collect()
+        changed = {name for name in second if first.get(name) != second[name]}
+        self.assertEqual(changed, {'site.css.gz', os.path.basename(staticfiles_storage.stored_name('css/site.css')) + '.gz'})
+
+    def test_files_not_worth_compressing_are_not_tried_again(self):
+        self.write('css/tiny.css', 'a{}')
+        self.collect()
+        skipped = staticfiles_storage.load_skipped()
+        self.assertEqual(set(skipped), {'css/tiny.css', staticfiles_storage.stored_name('css/tiny.css')})
+        with mock.patch('diy_blog.storage.ProcessPoolExecutor') as executor:
+            self.collect()
+        executor.assert_not_called()
+
+    def test_hashed_files_are_immutable(self):
+        self.collect()
+        hashed = self.client.get(staticfiles_storage.url('css/site.css'))
+        self.assertEqual(hashed['Cache-Control'], 'max-age=315360000, public, immutable')
+        plain = self.client.get('/static/css/site.css')
+        self.assertNotIn('immutable', plain['Cache-Control'])
+        self.assertEqual(self.client.get('/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip')['Content-Encoding'], 'gzip')
@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Blog, Comment
+from blog.tests.mixins import TestDataMixin
+
+
+class TransferTest(TestDataMixin, TestCase):
+    def export(self):
+        out = io.StringIO()
+        call_command('export_content', '-', stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def load(self, dump, *args):
+        path = self.tmp_path(dump)
+        out = io.StringIO()
+        call_command('import_content', path, *args, stdout=out)
+        return out.getvalue()
+
+    def tmp_path(self, dump):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False)
+        self.addCleanup(os.remove, handle.name)
+        with handle:
+            handle.write(dump)
+        return handle.name
+
+    def snapshot(self):
+        return (
+            list(get_user_model().objects.order_by('username').values_list('username', 'is_blogger', 'bio')),
+            list(Blog.objects.order_by('slug').values_list(
+                'slug', 'title', 'content', 'created_at', 'updated_at', 'blogger__username')),
+            sorted(Comment.objects.values_list(
+                'blog__slug', 'user__username', 'content', 'created_at', 'updated_at')),
+        )
+
+    def test_export_is_one_record_per_line(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        types = [record['type'] for record in records]
+        self.assertEqual(types.count('blog'), Blog.objects.count())
+        self.assertEqual(types.count('comment'), Comment.objects.count())
+        self.assertEqual(types, sorted(types, key=['user', 'blog', 'comment'].index))
+        self.assertNotIn('password', records[0])
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        dump = self.export()
+        get_user_model().objects.all().delete()
+
+        output = self.load(dump, '--batch-size', '2')
+        self.assertEqual(self.snapshot(), before)
+        self.assertIn('Imported 7 blog records', output)
+        self.assertTrue(get_user_model().objects.get(username='scrubby').has_perm('blog.blogger'))
+        self.assertFalse(get_user_model().objects.get(username='commenter').has_usable_password())
+
+    def test_importing_twice_changes_nothing(self):
+        before = self.snapshot()
+        output = self.load(self.export())
+        self.assertEqual(self.snapshot(), before)
+        self.assertNotIn('Imported', output)
+
+    def test_reindex(self):
+        dump = self.export()
+        Blog.objects.all().delete()
+        self.load(dump, '--reindex')
+        response = self.client.get(reverse('blog:search'), {'q': 'post2'})
+        self.assertEqual(response.context['blogs'], [Blog.objects.get(title='blog post2')])
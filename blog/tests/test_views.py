@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -5,7 +7,8 @@ from django.contrib.auth.models import Permission
 from django.db.models import Q
 
 from blog.tests.mixins import TestDataMixin
-from blog.models import Comment
+from blog.models import Blog, Comment
+from blog.views import BlogDetailView
 
 
 class BlogListViewTest(TestDataMixin, TestCase):
@@ -32,6 +35,52 @@ class BlogListViewTest(TestDataMixin, TestCase):
         self.assertEqual(context['is_paginated'], True)
         self.assertEqual(len(context['blogs']), 2)
 
+    def test_cursor_next_and_previous(self):
+        first = self.response.context['page_obj']
+        self.assertFalse(first.has_previous())
+        self.assertContains(self.response, f'?cursor={first.next_cursor}')
+
+        response = self.client.get(self.url, {'cursor': first.next_cursor})
+        second = response.context['page_obj']
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        expected = list(Blog.objects.order_by('-created_at', 'id'))
+        self.assertEqual(list(first) + list(second), expected)
+
+        response = self.client.get(self.url, {'cursor': second.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']), list(first))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_mode_skips_count(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(self.url, {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_sort_by_most_discussed(self):
+        for _ in range(2):
+            Comment.objects.create(blog=self.blog2, content='z', user=self.commenter)
+        response = self.client.get(self.url, {'sort': 'discussed'})
+        self.assertEqual(list(response.context['blogs'])[:2], [self.blog2, self.blog1])
+        self.assertContains(response, '3 comments')
+        self.assertContains(response, '&amp;sort=discussed')
+
+        # the cursor keeps walking the same ordering
+        next_page = self.client.get(self.url, {'sort': 'discussed', 'cursor': response.context['page_obj'].next_cursor})
+        seen = list(response.context['blogs']) + list(next_page.context['blogs'])
+        self.assertEqual(seen, list(Blog.objects.order_by('-comment_count', '-created_at', 'id')))
+
+    def test_sort_by_recent_activity(self):
+        Comment.objects.create(blog=self.blog2, content='z', user=self.commenter)
+        response = self.client.get(self.url, {'sort': 'active'})
+        self.assertEqual(list(response.context['blogs']), [self.blog2, self.blog1])
+
+    def test_sorting_needs_no_aggregate(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'sort': 'discussed'})
+
 
 class BlogDetailViewTest(TestDataMixin, TestCase):
     def setUp(self):
@@ -50,6 +99,45 @@ class BlogDetailViewTest(TestDataMixin, TestCase):
         self.assertEqual(blog.title, self.blog1.title)
         self.assertEqual(blog.content, self.blog1.content)
 
+    def test_duplicate_titles_resolve(self):
+        for blog in self.user1.blogs.all():
+            response = self.client.get(blog.get_absolute_url())
+            self.assertEqual(response.context['blog'], blog)
+
+    def test_old_slug_redirects(self):
+        blog = Blog.objects.get(pk=self.blog1.pk)
+        blog.title = 'renamed post'
+        blog.save()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, blog.get_absolute_url(), status_code=301)
+
+    def test_comments_paginated_with_cursor(self):
+        for i in range(4):
+            Comment.objects.create(blog=self.blog1, content=f'comment {i}', user=self.commenter)
+        with mock.patch.object(BlogDetailView, 'comments_per_page', 2):
+            first = self.client.get(self.url)
+            cursor = first.context['comments'].next_cursor
+            second = self.client.get(self.url, {'comments_after': cursor})
+            # a new comment must not shift the pages already handed out
+            Comment.objects.create(blog=self.blog1, content='late comment', user=self.commenter)
+            again = self.client.get(self.url, {'comments_after': cursor})
+        self.assertEqual(len(first.context['comments']), 2)
+        self.assertContains(first, 'Load more comments')
+        self.assertEqual([c.content for c in second.context['comments']], ['comment 1', 'comment 2'])
+        self.assertEqual(list(second.context['comments']), list(again.context['comments']))
+
+    def test_last_comment_page_has_no_link(self):
+        self.assertFalse(self.response.context['comments'].has_next())
+        self.assertNotContains(self.response, 'Load more comments')
+
+    def test_invalid_comment_cursor_is_404(self):
+        response = self.client.get(self.url, {'comments_after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_slug_is_404(self):
+        response = self.client.get(reverse('blog:detail', args=['no-such-post']))
+        self.assertEqual(response.status_code, 404)
+
 
 class TestBloggerListView(TestDataMixin, TestCase):
     def setUp(self):
@@ -254,4 +342,18 @@ class BlogCommentDeleteViewTest(TestDataMixin, TestCase):
         response = client.get(self.url, data={})
         self.assertEqual(response.status_code, 403)
 
+    def test_other_user_cannot_delete(self):
+        client = Client()
+        client.login(username='scrubby', password='12345')
+        response = client.post(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Comment.objects.filter(pk=self.comment.pk).exists())
+
+    def test_redirects_to_blog_after_delete(self):
+        response = self.authenticated_client().post(self.url)
+        self.assertRedirects(response, self.blog1.get_absolute_url(), fetch_redirect_response=False)
 
+    def test_missing_comment_is_404(self):
+        url = reverse('blog:delete_comment', kwargs={'pk': self.comment.pk + 1000})
+        response = self.authenticated_client().post(url)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,217 @@
+"""
+Export and import of users, posts and comments as newline-delimited JSON.
+
+Each line is one record with a ``type`` of ``user``, ``blog`` or
+``comment``. Posts name their blogger by username and comments name their
+post by slug, so a dump can be loaded into a database whose primary keys
+differ. Exports are written users first, then posts, then comments, which
+is the order the importer needs.
+
+Both directions stream: the exporter reads with chunked ``.iterator()``
+calls and the importer keeps one batch of rows plus the username and slug
+lookups in memory, however many comments the dump holds.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import reset_queries, transaction
+from django.utils.dateparse import parse_datetime
+
+from users.models import blogger_permission_id
+
+from . import cache
+from .models import Blog, Comment
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'bio', 'is_blogger', 'date_joined')
+BLOG_FIELDS = ('slug', 'title', 'content', 'created_at', 'updated_at')
+COMMENT_FIELDS = ('content', 'created_at', 'updated_at')
+
+
+def _default(value):
+    # keep microseconds, DjangoJSONEncoder drops them
+    return value.isoformat()
+
+
+class Progress:
+    """Count written or imported rows per record type and report their rate."""
+
+    def __init__(self, report=None):
+        self.report = report
+        self.counts = {}
+        self.seconds = {}
+        self.mark = time.monotonic()
+
+    def add(self, kind, count):
+        now = time.monotonic()
+        self.counts[kind] = self.counts.get(kind, 0) + count
+        self.seconds[kind] = self.seconds.get(kind, 0) + now - self.mark
+        self.mark = now
+        if self.report:
+            self.report(f'{kind}: {self.counts[kind]} rows ({self.rate(kind):.0f}/s)')
+
+    def skip(self):
+        """Leave the time since the last batch out of every rate."""
+        self.mark = time.monotonic()
+
+    def rate(self, kind):
+        return self.counts.get(kind, 0) / max(self.seconds.get(kind, 0), 1e-6)
+
+
+def export_records(batch_size=1000):
+    """Yield every record of the dump as a dict."""
+    users = get_user_model().objects.order_by('pk').values(*USER_FIELDS)
+    for row in users.iterator(chunk_size=batch_size):
+        yield dict(row, type='user')
+
+    blogs = Blog.objects.order_by('pk').values(*BLOG_FIELDS, 'blogger__username')
+    for row in blogs.iterator(chunk_size=batch_size):
+        row['blogger'] = row.pop('blogger__username')
+        yield dict(row, type='blog')
+
+    comments = Comment.objects.order_by('pk').values(*COMMENT_FIELDS, 'blog__slug', 'user__username')
+    for row in comments.iterator(chunk_size=batch_size):
+        row['blog'] = row.pop('blog__slug')
+        row['user'] = row.pop('user__username')
+        yield dict(row, type='comment')
+
+
+def export_content(out, batch_size=1000, report=None):
+    progress = Progress(report)
+    kind, count = None, 0
+    for record in export_records(batch_size):
+        out.write(json.dumps(record, default=_default) + '\n')
+        if record['type'] != kind or count == batch_size:
+            if count:
+                progress.add(kind, count)
+            kind, count = record['type'], 0
+        count += 1
+    if count:
+        progress.add(kind, count)
+    return progress
+
+
+@contextmanager
+def preserve_timestamps():
+    """Let bulk_create keep the dump's created_at and updated_at."""
+    fields = [field for model in (Blog, Comment) for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """
+    Load a dump with bulk_create, one transaction per batch. Users and
+    posts that already exist are kept as they are, and comments on posts
+    that already existed are skipped, so running the same dump twice
+    changes nothing.
+    """
+
+    def __init__(self, batch_size=1000, report=None):
+        self.batch_size = batch_size
+        self.progress = Progress(report)
+        self.pending = []
+        self.pending_type = None
+        self.skipped = 0
+        User = get_user_model()
+        self.users = dict(User.objects.values_list('username', 'pk').iterator())
+        # None marks posts that were there before the import
+        self.blogs = dict.fromkeys(Blog.objects.values_list('slug', flat=True).iterator())
+
+    def load(self, lines):
+        with preserve_timestamps():
+            for line in lines:
+                if line.strip():
+                    self.add(json.loads(line))
+            self.flush()
+        if self.progress.counts:
+            cache.purge('home', 'blogs', 'bloggers', 'blogger-pages')
+        return self.progress
+
+    def add(self, record):
+        if record['type'] != self.pending_type or len(self.pending) >= self.batch_size:
+            self.flush()
+            self.pending_type = record['type']
+        self.pending.append(record)
+
+    def flush(self):
+        if not self.pending:
+            return
+        create = getattr(self, f'_create_{self.pending_type}s')
+        with transaction.atomic():
+            count = create(self.pending)
+        self.skipped += len(self.pending) - count
+        if count:
+            self.progress.add(self.pending_type, count)
+        else:
+            self.progress.skip()
+        self.pending = []
+        # with DEBUG on every insert would stay in connection.queries
+        reset_queries()
+
+    def _create_users(self, records):
+        User = get_user_model()
+        users = []
+        for record in records:
+            if record['username'] in self.users:
+                continue
+            user = User(**{field: record[field] for field in USER_FIELDS})
+            user.date_joined = parse_datetime(record['date_joined'])
+            user.set_unusable_password()
+            users.append(user)
+            self.users[user.username] = None
+        if not users:
+            return 0
+        User.objects.bulk_create(users)
+        # bulk_create only returns primary keys on some databases
+        created = dict(User.objects.filter(username__in=[user.username for user in users])
+                       .values_list('username', 'pk'))
+        self.users.update(created)
+
+        permission_id = blogger_permission_id()
+        if permission_id is not None:
+            Through = User.user_permissions.through
+            Through.objects.bulk_create(
+                Through(customuser_id=created[user.username], permission_id=permission_id)
+                for user in users if user.is_blogger)
+        return len(users)
+
+    def _create_blogs(self, records):
+        blogs = []
+        for record in records:
+            blogger_id = self.users.get(record['blogger'])
+            if record['slug'] in self.blogs or blogger_id is None:
+                continue
+            blog = Blog(blogger_id=blogger_id, **{field: record[field] for field in BLOG_FIELDS})
+            blog.created_at = parse_datetime(record['created_at'])
+            blog.updated_at = parse_datetime(record['updated_at'])
+            blogs.append(blog)
+            self.blogs[blog.slug] = None
+        if not blogs:
+            return 0
+        Blog.objects.bulk_create(blogs)
+        self.blogs.update(Blog.objects.filter(slug__in=[blog.slug for blog in blogs]).values_list('slug', 'pk'))
+        return len(blogs)
+
+    def _create_comments(self, records):
+        comments = []
+        for record in records:
+            blog_id = self.blogs.get(record['blog'])
+            user_id = self.users.get(record['user'])
+            if blog_id is None or user_id is None:
+                continue
+            comments.append(Comment(
+                blog_id=blog_id, user_id=user_id, content=record['content'],
+                created_at=parse_datetime(record['created_at']),
+                updated_at=parse_datetime(record['updated_at']),
+            ))
+        Comment.objects.bulk_create(comments)
+        return len(comments)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name= 'blog'
 
@@ -8,6 +8,12 @@ urlpatterns = [
     path('blogs/', views.BlogListView.as_view(), name='blog'),
     path('bloggers/', views.BloggerListView.as_view(), name='bloggers'),
     path('blogger/<int:pk>/', views.BloggerDetailView.as_view(), name='blogger'),
+    path('blogger/<int:pk>/feeds/<slug:feed_format>/', feeds.BloggerFeedView.as_view(), name='blogger_feed'),
+    path('feeds/<slug:feed_format>/', feeds.BlogFeedView.as_view(), name='feed'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('api/blogs/', api.BlogListApiView.as_view(), name='api_blogs'),
+    path('api/blogs/<slug:slug>/', api.BlogDetailApiView.as_view(), name='api_blog'),
+    path('api/bloggers/', api.BloggerListApiView.as_view(), name='api_bloggers'),
     path('<slug:slug>/', views.BlogDetailView.as_view(), name='detail'),
     path('<slug:slug>/create/', views.CreateCommentView.as_view(), name='create_comment'),
     path('<int:pk>/update/', views.UpdateCommentView.as_view(), name='update_comment'),
@@ -1,47 +1,151 @@
 from django.views.generic import ListView, DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Permission
+from django.db.models import Count, Max
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.exceptions import PermissionDenied
-from django.db.models import Q
+from django.http import Http404, HttpResponsePermanentRedirect
+from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
 
-from .models import Blog, Comment
+from .models import Blog, BlogSlugRedirect, Comment
+from .cache import AnonymousPageCacheMixin
 from .forms import CommentForm
+from .mixins import ConditionalGetMixin, OwnerRequiredMixin
+from .pagination import CursorPaginationMixin, InvalidCursor, KeysetPaginator, page_signature
+from .search import search_blogs
 
 
-class BlogListView(ListView):
+class BlogListView(AnonymousPageCacheMixin, ConditionalGetMixin, CursorPaginationMixin, ListView):
     model = Blog
     template_name = 'blog/index.html'
     context_object_name='blogs'
     paginate_by = 5
+    cache_tags = ['blogs']
+    # each ordering is backed by an index on Blog
+    sort_orderings = {
+        'recent': ('-created_at', 'id'),
+        'discussed': ('-comment_count', '-created_at', 'id'),
+        'active': ('-last_comment_at', 'id'),
+    }
 
+    def get_sort(self):
+        sort = self.request.GET.get('sort')
+        return sort if sort in self.sort_orderings else 'recent'
 
-class BlogDetailView(DetailView):
+    def get_cursor_ordering(self):
+        return self.sort_orderings[self.get_sort()]
+
+    def get_queryset(self):
+        queryset = super().get_queryset().for_listing()
+        if self.get_sort() == 'active':
+            # a cursor cannot seek past NULL, and these posts were never active
+            queryset = queryset.filter(last_comment_at__isnull=False)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sort'] = self.get_sort()
+        return context
+
+    def get_etag_data(self, context):
+        rows = [(blog.pk, blog.updated_at, blog.comment_count) for blog in context['blogs']]
+        return rows + [page_signature(context['page_obj'])]
+
+
+class BlogDetailView(AnonymousPageCacheMixin, ConditionalGetMixin, DetailView):
     model = Blog
     template_name='blog/detail.html'
     context_object_name = 'blog'
+    comments_per_page = 50
 
+    def get_cache_tags(self):
+        return [f"blog:{self.kwargs['slug']}"]
 
-class BloggerListView(ListView):
+    def get_queryset(self):
+        return (Blog.objects.select_related('blogger')
+                .only('title', 'content_html', 'slug', 'updated_at', 'blogger', 'blogger__username'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments = Comment.objects.for_display().filter(blog=self.object)
+        paginator = KeysetPaginator(comments, self.comments_per_page, ordering=('created_at', 'id'))
+        try:
+            context['comments'] = paginator.page(self.request.GET.get('comments_after'))
+        except InvalidCursor:
+            raise Http404('Invalid comments cursor.')
+        return context
+
+    def get_etag_data(self, context):
+        blog, comments = context['blog'], context['comments']
+        rows = [(comment.pk, comment.updated_at, comment.user.username) for comment in comments]
+        return [blog.updated_at, blog.blogger.username, comments.next_cursor] + rows
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            # the post may have been renamed, send readers to its current slug
+            redirect = get_object_or_404(BlogSlugRedirect.objects.select_related('blog'), old_slug=kwargs['slug'])
+            return HttpResponsePermanentRedirect(redirect.blog.get_absolute_url())
+
+
+class BloggerListView(AnonymousPageCacheMixin, CursorPaginationMixin, ListView):
     context_object_name = 'bloggers'
     template_name = 'blog/bloggers.html'
+    cache_tags = ['bloggers']
+    paginate_by = 20
+    cursor_ordering = ('username', 'id')
 
     def get_queryset(self):
-        permission = Permission.objects.get(name='create update and delete blogs')
-        return get_user_model().objects.filter(Q(user_permissions=permission) | Q(is_superuser=True)).distinct()
+        # one grouped query; the join and the maximum can be read from blog_blog_blogger_idx
+        return (get_user_model().objects.bloggers().only('username')
+                .annotate(post_count=Count('blogs'), latest_post_at=Max('blogs__created_at')))
 
 
-class BloggerDetailView(DetailView):
+class BloggerDetailView(AnonymousPageCacheMixin, ConditionalGetMixin, DetailView):
     context_object_name = 'blogger'
     template_name = 'blog/blogger.html'
-    
+    blogs_per_page = 20
+
+    def get_cache_tags(self):
+        return ['blogger-pages', f"blogger:{self.kwargs['pk']}"]
+
     def get_queryset(self):
-        permission = Permission.objects.get(name='create update and delete blogs')
-        return get_user_model().objects.filter(Q(user_permissions=permission) | Q(is_superuser=True), pk=self.kwargs['pk'])
+        return get_user_model().objects.bloggers()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        paginator = KeysetPaginator(self.object.blogs.for_listing(), self.blogs_per_page, ('-created_at', 'id'))
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        context.update(blogs=page, page_obj=page, is_paginated=page.has_other_pages())
+        return context
+
+    def get_etag_data(self, context):
+        blogger, page = context['blogger'], context['page_obj']
+        rows = [(blog.pk, blog.updated_at) for blog in context['blogs']]
+        return [blogger.username, blogger.bio, page_signature(page)] + rows
+
+
+class SearchView(ListView):
+    template_name = 'blog/search.html'
+    context_object_name = 'blogs'
+    max_results = 50
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return []
+        return search_blogs(self.query, limit=self.max_results)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
 
 
 class CreateCommentView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
@@ -55,48 +159,30 @@ class CreateCommentView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        form.instance.blog = Blog.objects.get(slug=str(self.kwargs['slug']))
+        form.instance.blog = get_object_or_404(Blog, slug=self.kwargs['slug'])
         return super().form_valid(form)
 
 
-class UpdateCommentView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
+class UpdateCommentView(OwnerRequiredMixin, LoginRequiredMixin, SuccessMessageMixin, UpdateView):
     model = Comment
     template_name = 'blog/comment_form.html'
     form_class = CommentForm
     success_message = 'The blog has been updated.'
+    owner_select_related = ('blog',)
 
     def get_success_url(self):
-        comment = self.get_object()
-        return comment.blog.get_absolute_url()
+        return self.object.blog.get_absolute_url()
 
-    def form_valid(self, form):
-        comment = self.get_object()
-        form.instance.user = self.request.user
-        form.instance.blog = comment.blog
-        return super().form_valid(form)
-    
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.user != self.request.user:
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
 
-
-class DeleteCommentView(LoginRequiredMixin, DeleteView):
+class DeleteCommentView(OwnerRequiredMixin, LoginRequiredMixin, DeleteView):
     model = Comment
     template_name = 'blog/delete.html'
+    owner_select_related = ('blog',)
 
     def get_success_url(self):
-        comment = self.get_object()
-        return comment.blog.get_absolute_url()
-    
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.user != self.request.user:
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-    
+        return self.object.blog.get_absolute_url()
+
     def delete(self, request, *args, **kwargs):
         message = f"The comment has been deleted."
         messages.warning(self.request, message)
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+        return super().delete(request, *args, **kwargs)
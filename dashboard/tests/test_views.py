@@ -1,8 +1,8 @@
 from django.test import TestCase, Client
-from blog.tests.mixins import TestDataMixin
+from blog.tests.mixins import TestDataMixin, QueryBudgetMixin
 from django.urls import reverse
 
-from blog.models import Blog
+from blog.models import Blog, Comment
 
 
 class DashboardViewTest(TestDataMixin, TestCase):
@@ -48,6 +48,14 @@ class DashboardViewTest(TestDataMixin, TestCase):
         self.assertEqual(context['is_paginated'], True)
         self.assertEqual(len(context['blogs']), 2)
 
+    def test_cursor_pages(self):
+        client = self.authenticated_client()
+        first = client.get(self.url).context['page_obj']
+        second = client.get(self.url, {'cursor': first.next_cursor}).context['page_obj']
+        expected = list(self.user1.blogs.order_by('-created_at', 'id'))
+        self.assertEqual(list(first) + list(second), expected)
+        self.assertFalse(second.has_next())
+
 
 class BlogCreateViewTest(TestDataMixin, TestCase):
     def setUp(self):
@@ -222,3 +230,38 @@ class BlogDeleteViewTest(TestDataMixin, TestCase):
         response = self.client.post(self.url)
         self.assertEqual(response.status_code, 403)
 
+
+class DashboardQueryBudgetTest(QueryBudgetMixin, TestDataMixin, TestCase):
+    def authenticated_client(self):
+        client = Client()
+        client.login(username=self.user1.username, password='12345')
+        return client
+
+    def test_index(self):
+        self.assertQueryBudget(5, reverse('dashboard:index'), self.authenticated_client())
+
+    def test_create_form(self):
+        self.assertQueryBudget(4, reverse('dashboard:create_blog'), self.authenticated_client())
+
+    def test_update_form(self):
+        blog = self.user1.blogs.first()
+        url = reverse('dashboard:update_blog', kwargs={'slug': blog.slug})
+        self.assertQueryBudget(5, url, self.authenticated_client())
+
+    def test_delete(self):
+        blog = self.user1.blogs.first()
+        url = reverse('dashboard:delete_blog', kwargs={'slug': blog.slug})
+        client = self.authenticated_client()
+        with self.assertNumQueries(9):
+            client.post(url)
+        self.assertFalse(Blog.objects.filter(pk=blog.pk).exists())
+
+    def test_delete_does_not_grow_with_comments(self):
+        blog = self.user1.blogs.first()
+        Comment.objects.bulk_create(Comment(blog=blog, user=self.commenter, content='z') for _ in range(50))
+        url = reverse('dashboard:delete_blog', kwargs={'slug': blog.slug})
+        client = self.authenticated_client()
+        # the comments and their search rows are deleted in one query each
+        with self.assertNumQueries(11):
+            client.post(url)
+        self.assertFalse(Comment.objects.filter(blog_id=blog.pk).exists())
@@ -4,14 +4,15 @@ from django.contrib.auth.mixins import PermissionRequiredMixin, LoginRequiredMix
 from django.contrib.auth import get_user_model
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib import messages
-from django.core.exceptions import PermissionDenied
 from django.urls import reverse_lazy
 
+from blog.mixins import OwnerRequiredMixin
 from blog.models import Blog
+from blog.pagination import CursorPaginationMixin
 from dashboard.forms import BlogForm
 
 
-class BlogListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class BlogListView(LoginRequiredMixin, PermissionRequiredMixin, CursorPaginationMixin, ListView):
     model = Blog
     permission_required = 'blog.blogger'
     template_name = "dashboard/index.html"
@@ -20,7 +21,7 @@ class BlogListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
 
     def get_queryset(self):
         blogger = self.request.user
-        return blogger.blogs.all()
+        return blogger.blogs.for_listing()
 
 
 class BlogCreateView(LoginRequiredMixin, PermissionRequiredMixin, SuccessMessageMixin, CreateView):
@@ -41,43 +42,28 @@ class BlogCreateView(LoginRequiredMixin, PermissionRequiredMixin, SuccessMessage
         return super().form_valid(form)
 
 
-class BlogUpdateView(LoginRequiredMixin, PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
+class BlogUpdateView(OwnerRequiredMixin, LoginRequiredMixin, PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
     model = Blog
     template_name = "dashboard/blog_form.html"
     permission_required = 'blog.blogger'
     form_class = BlogForm
     success_url = reverse_lazy('dashboard:index')
     success_message = "The blog has been updated."
+    owner_field = 'blogger'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["update"] = True
         return context
-    
-    def form_valid(self, form):
-        form.instance.blogger = self.request.user
-        return super().form_valid(form)
-    
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.blogger != self.request.user:
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
 
 
-class BlogDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class BlogDeleteView(OwnerRequiredMixin, LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Blog
     http_method_names = ['post']
     permission_required = 'blog.blogger'
     success_url = reverse_lazy('dashboard:index')
+    owner_field = 'blogger'
 
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.blogger != self.request.user:
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-    
     def delete(self, request, *args, **kwargs):
         message = f"The blog has been deleted."
         messages.warning(self.request, message)
@@ -0,0 +1,17 @@
+"""
+ASGI config for diy_blog project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+for servers such as ``gunicorn diy_blog.asgi -k uvicorn.workers.UvicornWorker``.
+The views themselves still run synchronously, see diy_blog.handlers.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diy_blog.settings')
+
+from diy_blog.handlers import AsgiHandler  # noqa: E402  needs the settings module
+
+application = AsgiHandler(get_wsgi_application())
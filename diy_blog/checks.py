@@ -0,0 +1,37 @@
+"""
+System checks for settings that only work together, run by ``manage.py
+check`` and before the server and the tests start.
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+
+def _local_cache():
+    return settings.CACHES['default']['BACKEND'] in settings.LOCAL_CACHE_BACKENDS
+
+
+@register()
+def page_cache_check(app_configs, **kwargs):
+    if settings.PAGE_CACHE_TIMEOUT > 0 and _local_cache():
+        return [Warning(
+            'The page cache is on, but the cache backend is local to each process.',
+            hint='Purges only reach the worker that made them, the others serve stale pages. '
+                 'Set CACHE_BACKEND to a shared cache such as memcached or redis, '
+                 'or PAGE_CACHE_TIMEOUT=0.',
+            id='diy_blog.W001',
+        )]
+    return []
+
+
+@register()
+def session_store_check(app_configs, **kwargs):
+    if settings.SESSION_ENGINE in (settings.SESSION_ENGINES['cached_db'], settings.SESSION_ENGINES['cache']) \
+            and _local_cache():
+        return [Error(
+            'Sessions are kept in a cache that is local to each process.',
+            hint='A logout only clears the session from the worker that handled it, the others '
+                 'keep accepting the cookie. Set CACHE_BACKEND to a shared cache, or SESSION_STORE '
+                 'to db or signed_cookies.',
+            id='diy_blog.E001',
+        )]
+    return []
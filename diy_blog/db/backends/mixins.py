@@ -0,0 +1,72 @@
+from ..pool import get_pool, record
+
+
+class ManagedConnectionMixin:
+    """
+    Database wrapper additions for persistent and pooled connections.
+
+    With CONN_HEALTH_CHECKS on, a connection kept from an earlier request
+    is tested once, the first time a request uses it, and replaced if the
+    server has dropped it. With a POOL configured, closing a connection
+    hands it back to a pool shared by the worker's threads and opening
+    one takes an idle connection from there first.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool = get_pool(self.alias, self.settings_dict.get('POOL'))
+
+    def ensure_connection(self):
+        if self.connection is not None and not self.health_check_done:
+            self.health_check_done = True
+            if (self.settings_dict.get('CONN_HEALTH_CHECKS') and not self.in_atomic_block
+                    and not self.is_usable()):
+                record(self.alias, 'unusable')
+                self.close()
+            else:
+                record(self.alias, 'reused')
+        super().ensure_connection()
+
+    def connect(self):
+        # a fresh connection needs no check, and connect() itself ensures one
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        # runs when a request starts and finishes; the check waits for the
+        # request's first query rather than the get_autocommit() in here
+        self.health_check_done = True
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def get_new_connection(self, conn_params):
+        if self.pool is not None:
+            check = self._raw_is_usable if self.settings_dict.get('CONN_HEALTH_CHECKS') else None
+            connection = self.pool.acquire(check)
+            if connection is not None:
+                return connection
+        connection = super().get_new_connection(conn_params)
+        record(self.alias, 'created')
+        if self.pool is not None:
+            self.pool.add(connection)
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        try:
+            # never hand out a connection in the middle of a transaction
+            self.connection.rollback()
+        except self.Database.Error:
+            return super()._close()
+        self.pool.release(self.connection)
+
+    def _raw_is_usable(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except self.Database.Error:
+            return False
+        return True
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from ..mixins import ManagedConnectionMixin
+
+
+class DatabaseWrapper(ManagedConnectionMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,106 @@
+"""
+A process-wide pool of idle database connections, shared by the threads
+of a worker, and counters of how often connections are created or reused.
+"""
+import threading
+import time
+from collections import Counter, deque
+
+_lock = threading.Lock()
+_pools = {}
+_metrics = {}
+
+
+def record(alias, event):
+    with _lock:
+        _metrics.setdefault(alias, Counter())[event] += 1
+
+
+def metrics():
+    """Counters per database alias: created, reused, pooled, unusable, discarded."""
+    with _lock:
+        return {alias: dict(counter) for alias, counter in _metrics.items()}
+
+
+def reset_metrics():
+    with _lock:
+        _metrics.clear()
+
+
+class ConnectionPool:
+    """
+    Keep up to ``size`` idle connections. A connection is handed out again
+    unless it is older than ``max_age`` seconds or ``check`` rejects it;
+    connections over the size limit are closed when given back.
+    """
+    def __init__(self, alias, size, max_age=None):
+        self.alias = alias
+        self.size = size
+        self.max_age = max_age
+        self._idle = deque()
+        self._born = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, check=None):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # most recently used first, so surplus connections age out
+                connection = self._idle.pop()
+            if self._expired(connection):
+                record(self.alias, 'discarded')
+                self._discard(connection)
+                continue
+            if check is not None and not check(connection):
+                record(self.alias, 'unusable')
+                self._discard(connection)
+                continue
+            record(self.alias, 'pooled')
+            return connection
+
+    def add(self, connection):
+        """Track a connection that was just opened for this pool."""
+        with self._lock:
+            self._born[id(connection)] = time.monotonic()
+
+    def release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size and not self._expired(connection):
+                self._idle.append(connection)
+                return
+        record(self.alias, 'discarded')
+        self._discard(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+
+    def __len__(self):
+        return len(self._idle)
+
+    def _expired(self, connection):
+        if self.max_age is None:
+            return False
+        born = self._born.get(id(connection))
+        return born is None or time.monotonic() - born >= self.max_age
+
+    def _discard(self, connection):
+        with self._lock:
+            self._born.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(alias, options):
+    """The pool for ``alias``, or None when pooling is off for it."""
+    if not options:
+        return None
+    with _lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(alias, options['SIZE'], options.get('MAX_AGE'))
+        return _pools[alias]
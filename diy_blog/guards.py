@@ -0,0 +1,45 @@
+"""
+A development check that list pages fetch every column their templates
+use. While a template is being rendered, loading a field that was left
+out with only() or defer() raises instead of quietly running one query
+per row.
+"""
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+class DeferredFieldLoaded(Exception):
+    pass
+
+
+def set_deferred_loads_forbidden(forbidden):
+    _state.forbidden = forbidden
+
+
+def deferred_loads_forbidden():
+    return getattr(_state, 'forbidden', False)
+
+
+@contextmanager
+def forbid_deferred_loads():
+    previous = deferred_loads_forbidden()
+    set_deferred_loads_forbidden(True)
+    try:
+        yield
+    finally:
+        set_deferred_loads_forbidden(previous)
+
+
+class DeferredLoadGuardMixin:
+    """For models whose deferred fields should not be loaded by templates."""
+
+    def refresh_from_db(self, using=None, fields=None):
+        # Django loads a deferred field with refresh_from_db(fields=[name])
+        if fields and deferred_loads_forbidden():
+            names = ', '.join(fields)
+            raise DeferredFieldLoaded(
+                f'{type(self).__name__}.{names} was deferred and then loaded while rendering a template. '
+                f'Add it to the only() of the view\'s queryset.')
+        super().refresh_from_db(using, fields)
@@ -0,0 +1,145 @@
+"""
+An ASGI application that serves Django's WSGI handler.
+
+Django 2.2 has neither an ASGI handler nor an async ORM, so the views
+still run synchronously. What this adds is that only the Django work
+takes a thread: the event loop reads request bodies and writes responses,
+so a worker keeps serving while many slow clients trickle data in or out,
+and the number of threads (and with them database connections) stays
+fixed at ASGI_THREADS. A streaming response keeps its thread until the
+whole body is sent, since producing it may still use the database.
+"""
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Cannot serve {scope['type']!r} connections.")
+
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        # a few messages ahead at most, so a slow client holds back the body
+        messages = asyncio.Queue(maxsize=8)
+        stopped = threading.Event()
+
+        def put(message):
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(messages.put(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            put({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+
+        def run():
+            # the view, a streaming body and close() (which ends the request)
+            # all use the connections of one thread, so they all run on it
+            try:
+                response = self.wsgi_application(self.environ(scope, body), start_response)
+                try:
+                    send_body(response)
+                finally:
+                    response.close()
+            finally:
+                put(None)
+
+        def send_body(response):
+            if not getattr(response, 'streaming', False):
+                put({'type': 'http.response.body', 'body': b''.join(response)})
+                return
+            for chunk in response:
+                if stopped.is_set():
+                    return
+                if chunk:
+                    put({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            put({'type': 'http.response.body', 'body': b''})
+
+        done = loop.run_in_executor(self.executor, run)
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    break
+                await send(message)
+        finally:
+            # let a thread waiting for room in the queue see that it should stop
+            stopped.set()
+            while not messages.empty():
+                messages.get_nowait()
+            await done
+
+    async def read_body(self, receive):
+        """Spool the request body, or return None if the client went away."""
+        body = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        body.seek(0, 2)
+        length = body.tell()
+        body.seek(0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            # WSGI carries the raw path bytes as latin-1
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'CONTENT_LENGTH': str(length),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,122 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.urls import Resolver404, resolve
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import profiling
+from .guards import set_deferred_loads_forbidden
+from .routers import replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class ReplicaMiddleware:
+    """
+    Read from the replicas while serving GET/HEAD requests to the apps in
+    REPLICA_APPS, and pin a reader to the primary for a short while after
+    any other request so they see their own writes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with replica_reads(self.use_replicas(request)):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def use_replicas(self, request):
+        if (request.method not in SAFE_METHODS or not settings.DATABASE_REPLICAS
+                or settings.REPLICA_STICKY_COOKIE in request.COOKIES):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.func.__module__.split('.')[0] in settings.REPLICA_APPS
+
+
+class ProfilingMiddleware:
+    """
+    Profile a PROFILING_SAMPLE_RATE share of the requests and add them to
+    the histograms of their URL name. Requests left out of the sample cost
+    one random number.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return self.get_response(request)
+
+        profile = request._profile = profiling.Profile()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(profile))
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        # set by blog.cache.AnonymousPageCacheMixin
+        page_cache = getattr(request, 'page_cache', 'none')
+        profiling.record(match.view_name if match else 'unresolved', profile, page_cache)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            # the outermost middleware runs this last, right before rendering
+            started, db_seconds = time.perf_counter(), profile.db_seconds
+
+            def rendered(response):
+                queries = profile.db_seconds - db_seconds
+                profile.template_seconds += time.perf_counter() - started - queries
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class DeferredLoadGuardMiddleware:
+    """
+    Raise diy_blog.guards.DeferredFieldLoaded when a template response
+    loads a deferred field. Only installed with DEFERRED_LOAD_GUARD on.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            # a render that raised never reached its callback
+            set_deferred_loads_forbidden(False)
+
+    def process_template_response(self, request, response):
+        # from here, right before rendering, until the render is done
+        set_deferred_loads_forbidden(True)
+        response.add_post_render_callback(lambda response: set_deferred_loads_forbidden(False))
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, with the static files manifest read when the worker boots
+    instead of by the first page that links a static file. Files named in
+    the manifest get far-future ``Cache-Control: immutable`` headers.
+    """
+    def __init__(self, get_response=None, settings=settings):
+        # WhiteNoise's own test hashes every name back through the storage
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        super().__init__(get_response, settings)
+
+    def immutable_file_test(self, path, url):
+        if not url.startswith(self.static_prefix):
+            return False
+        return url[len(self.static_prefix):] in self.hashed_names
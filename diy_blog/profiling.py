@@ -0,0 +1,148 @@
+"""
+Per-view request profiles: wall time, database queries and their time,
+template rendering time and full-page cache results, aggregated into
+fixed-bucket histograms per URL name.
+
+The histograms live in the worker process, like the connection counters
+in diy_blog.db.pool, so each worker reports its own share; Prometheus adds
+them up across the scrape targets.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# name, help text, buckets
+METRICS = (
+    ('request_seconds', 'Wall time of the request.', SECONDS_BUCKETS),
+    ('db_queries', 'Database queries run by the request.', COUNT_BUCKETS),
+    ('db_seconds', 'Time spent in database queries.', SECONDS_BUCKETS),
+    ('template_seconds', 'Time spent rendering templates, queries excluded.', SECONDS_BUCKETS),
+)
+
+_lock = threading.Lock()
+_histograms = {}
+_page_cache = Counter()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, as Prometheus wants them."""
+        total, pairs = 0, []
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {_format_bound(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else f'{bound:g}'
+
+
+class Profile:
+    """What one sampled request has spent so far."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0
+        self.template_seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # a connection execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+def record(view, profile, page_cache):
+    observations = {
+        'request_seconds': time.perf_counter() - profile.started,
+        'db_queries': profile.queries,
+        'db_seconds': profile.db_seconds,
+        'template_seconds': profile.template_seconds,
+    }
+    with _lock:
+        for name, _, buckets in METRICS:
+            histogram = _histograms.get((view, name))
+            if histogram is None:
+                histogram = _histograms[view, name] = Histogram(buckets)
+            histogram.observe(observations[name])
+        _page_cache[view, page_cache] += 1
+
+
+def snapshot():
+    """Histograms and page cache results per view name."""
+    with _lock:
+        views = {}
+        for (view, name), histogram in sorted(_histograms.items()):
+            views.setdefault(view, {})[name] = histogram.as_dict()
+        for (view, result), count in _page_cache.items():
+            views.setdefault(view, {}).setdefault('page_cache', {})[result] = count
+        return views
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _page_cache.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus(connection_metrics=None):
+    """The histograms in the Prometheus text exposition format."""
+    with _lock:
+        histograms = sorted(_histograms.items())
+        page_cache = sorted(_page_cache.items())
+    lines = []
+    for name, help_text, _ in METRICS:
+        lines += [f'# HELP diy_blog_{name} {help_text}', f'# TYPE diy_blog_{name} histogram']
+        for (view, metric), histogram in histograms:
+            if metric != name:
+                continue
+            label = f'view="{_escape(view)}"'
+            for bound, count in histogram.cumulative():
+                lines.append(f'diy_blog_{name}_bucket{{{label},le="{_format_bound(bound)}"}} {count}')
+            lines.append(f'diy_blog_{name}_sum{{{label}}} {histogram.sum:g}')
+            lines.append(f'diy_blog_{name}_count{{{label}}} {histogram.count}')
+
+    lines += ['# HELP diy_blog_page_cache_total Full-page cache results.',
+              '# TYPE diy_blog_page_cache_total counter']
+    for (view, result), count in page_cache:
+        lines.append(f'diy_blog_page_cache_total{{view="{_escape(view)}",result="{result}"}} {count}')
+
+    if connection_metrics is not None:
+        lines += ['# HELP diy_blog_db_connections_total Database connections by what happened to them.',
+                  '# TYPE diy_blog_db_connections_total counter']
+        for alias, events in sorted(connection_metrics.items()):
+            for event, count in sorted(events.items()):
+                lines.append(f'diy_blog_db_connections_total{{alias="{_escape(alias)}",event="{event}"}} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,60 @@
+"""
+Send reads to the read replicas listed in DATABASE_REPLICAS while
+replica reads are switched on for the current request or block, and
+everything else to the primary.
+
+ReplicaMiddleware switches replica reads on for GET/HEAD requests to the
+blog and pages views, except for readers who wrote something in the last
+REPLICA_STICKY_SECONDS: they keep reading from the primary, so they never
+load a page from a replica that has not caught up with their own change.
+Pages rendered for the page cache read from the primary as well, since
+the cache keeps them far longer than a replica lags.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def replica_reads_enabled():
+    return getattr(_state, 'enabled', False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    previous = replica_reads_enabled()
+    _state.enabled = enabled
+    try:
+        yield
+    finally:
+        _state.enabled = previous
+
+
+def read_from_primary():
+    """Send the rest of the current request's (or block's) reads to the primary."""
+    _state.enabled = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not replica_reads_enabled():
+            return DEFAULT_DB_ALIAS
+        # a replica cannot see the primary's open transaction
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 import os
 
 import dj_database_url
-from decouple import config
+from decouple import Csv, config
 
 DATABASE_URL = config('DATABASE_URL')
 
@@ -52,17 +52,20 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'blog.apps.BlogConfig',
     'dashboard.apps.DashboardConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
+    'diy_blog.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'diy_blog.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'diy_blog.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'diy_blog.urls'
@@ -85,6 +88,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'diy_blog.wsgi.application'
 
+# threads the ASGI entry point (diy_blog.asgi) runs Django's views on
+ASGI_THREADS = config('ASGI_THREADS', default=8, cast=int)
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -92,6 +98,115 @@ WSGI_APPLICATION = 'diy_blog.wsgi.application'
 DATABASES = {}
 DATABASES['default'] =  dj_database_url.config(default='postgres://localhost/diyblog')
 
+# Read replicas, as comma separated database URLs. GET requests to the
+# REPLICA_APPS views read from them, except for readers who wrote something
+# in the last REPLICA_STICKY_SECONDS.
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica{index}'] = dj_database_url.parse(url)
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['diy_blog.routers.ReplicaRouter']
+REPLICA_APPS = ['blog', 'pages']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+REPLICA_STICKY_COOKIE = 'read_primary'
+
+# Seconds a connection stays open for later requests, 0 closes it after each
+# request. With DATABASE_POOL_SIZE set, connections go back to a pool shared
+# by the worker's threads after each request and live this long in the pool.
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=60, cast=int)
+DATABASE_POOL_SIZE = config('DATABASE_POOL_SIZE', default=0, cast=int)
+DATABASE_HEALTH_CHECKS = config('DATABASE_HEALTH_CHECKS', default=True, cast=bool)
+DATABASE_BACKENDS = {
+    'django.db.backends.postgresql': 'diy_blog.db.backends.postgresql',
+    'django.db.backends.postgresql_psycopg2': 'diy_blog.db.backends.postgresql',
+    'django.db.backends.sqlite3': 'diy_blog.db.backends.sqlite3',
+}
+for database in DATABASES.values():
+    database['ENGINE'] = DATABASE_BACKENDS.get(database['ENGINE'], database['ENGINE'])
+    database['CONN_MAX_AGE'] = 0 if DATABASE_POOL_SIZE else DATABASE_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = DATABASE_HEALTH_CHECKS
+    database['POOL'] = {'SIZE': DATABASE_POOL_SIZE, 'MAX_AGE': DATABASE_CONN_MAX_AGE} if DATABASE_POOL_SIZE else None
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='diy-blog'),
+    }
+}
+
+# backends only the current process sees: a purge, or a session deleted at
+# logout, would not reach the other workers
+LOCAL_CACHE_BACKENDS = [
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+]
+SHARED_CACHE = CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+# seconds anonymous pages stay in the full-page cache, 0 turns it off
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300 if SHARED_CACHE else 0, cast=int)
+
+
+# Sessions and messages
+# db reads django_session on every logged in request; cached_db reads it from
+# the cache and only writes to the table; cache never touches the database but
+# loses sessions on eviction; signed_cookies keeps the session in the browser,
+# so it cannot be revoked server side before it expires
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+# cached_db and cache need a cache every worker shares, see diy_blog.checks
+SESSION_ENGINE = SESSION_ENGINES[config('SESSION_STORE', default='db')]
+# flash messages ride in their own cookie instead of falling back to the session
+MESSAGE_STORAGE = config('MESSAGE_STORAGE', default='django.contrib.messages.storage.cookie.CookieStorage')
+
+
+# Tests
+# the suite sets the page cache, profiling and jobs itself, see diy_blog.test_runner
+
+TEST_RUNNER = 'diy_blog.test_runner.TestRunner'
+
+
+# Development checks
+# raise when a template loads a column its view left out with only()
+
+DEFERRED_LOAD_GUARD = config('DEFERRED_LOAD_GUARD', default=config('DEBUG', cast=bool), cast=bool)
+if DEFERRED_LOAD_GUARD:
+    MIDDLEWARE.append('diy_blog.middleware.DeferredLoadGuardMiddleware')
+
+
+# Background jobs, see jobs.queue
+# run jobs inline where no run_jobs worker is running
+
+JOBS_EAGER = config('JOBS_EAGER', default=config('DEBUG', cast=bool), cast=bool)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+# wait before the second attempt, doubled for every one after
+JOBS_BACKOFF_SECONDS = config('JOBS_BACKOFF_SECONDS', default=10, cast=int)
+JOBS_MAX_BACKOFF_SECONDS = config('JOBS_MAX_BACKOFF_SECONDS', default=3600, cast=int)
+# a job running this long is taken to have lost its worker
+JOBS_LEASE_SECONDS = config('JOBS_LEASE_SECONDS', default=300, cast=int)
+
+
+# Profiling
+# share of requests diy_blog.middleware.ProfilingMiddleware times, 0 turns it off
+
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.1, cast=float)
+# bearer token for scraping /metrics/ without a staff session
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+
+# Search
+# empty picks blog.search.PostgresSearchBackend on Postgres, the portable one elsewhere
+
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='')
+SEARCH_INCLUDE_COMMENTS = config('SEARCH_INCLUDE_COMMENTS', default=True, cast=bool)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,7 +248,9 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATICFILES_STORAGE = 'diy_blog.storage.ParallelCompressedManifestStaticFilesStorage'
+# processes compressing collectstatic's output, 0 for one per CPU
+STATIC_COMPRESS_WORKERS = config('STATIC_COMPRESS_WORKERS', default=0, cast=int)
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
@@ -0,0 +1,76 @@
+"""
+Static files storage that compresses collectstatic's output in parallel.
+
+WhiteNoise's storage writes the gzip (and, with the brotli package
+installed, Brotli) copy of every file one after another on each run. Here
+the files are spread over a process pool and only the files that changed
+are compressed: a hashed name is only ever written with the same
+content, and other files are compared by modification time. Files that
+compression did not make smaller get no copies, they are listed in
+STATIC_ROOT/compress-skipped.json so they are not tried again.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+def _compress(path, extensions):
+    return list(Compressor(extensions=extensions, quiet=True).compress(path))
+
+
+class ParallelCompressedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    skipped_name = 'compress-skipped.json'
+
+    def compress_files(self, names):
+        extensions = getattr(settings, 'WHITENOISE_SKIP_COMPRESS_EXTENSIONS', None)
+        compressor = self.create_compressor(extensions=extensions, quiet=True)
+        suffixes = ['.gz'] + (['.br'] if compressor.use_brotli else [])
+        hashed_names = set(self.hashed_files.values())
+        skipped = self.load_skipped()
+        paths = {}
+        for name in names:
+            if compressor.should_compress(name):
+                path = self.path(name)
+                if not self.is_compressed(path, suffixes, name in hashed_names, skipped.get(name)):
+                    paths[path] = name
+        if not paths:
+            return
+
+        with ProcessPoolExecutor(settings.STATIC_COMPRESS_WORKERS or None) as executor:
+            compressed = executor.map(_compress, paths, [extensions] * len(paths), chunksize=16)
+            for (path, name), compressed_paths in zip(paths.items(), compressed):
+                if len(compressed_paths) < len(suffixes):
+                    skipped[name] = os.stat(path).st_mtime
+                else:
+                    skipped.pop(name, None)
+                prefix_len = len(path) - len(name)
+                for compressed_path in compressed_paths:
+                    yield name, compressed_path[prefix_len:]
+        with open(self.path(self.skipped_name), 'w') as handle:
+            json.dump(skipped, handle, indent=0, sort_keys=True)
+
+    def load_skipped(self):
+        """Names that were not worth compressing, with their mtime at the time."""
+        try:
+            with open(self.path(self.skipped_name)) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def is_compressed(path, suffixes, hashed, skipped_mtime=None):
+        if hashed:
+            # CSS is saved again on every run, but under a name that fixes its content
+            return skipped_mtime is not None or all(os.path.exists(path + suffix) for suffix in suffixes)
+        # the compressor gives its copies the mtime of the file they were made from
+        try:
+            mtime = os.stat(path).st_mtime
+            if skipped_mtime == mtime:
+                return True
+            return all(os.stat(path + suffix).st_mtime == mtime for suffix in suffixes)
+        except FileNotFoundError:
+            return False
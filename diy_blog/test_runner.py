@@ -0,0 +1,33 @@
+"""
+Runner for ``python manage.py test``.
+
+The suite runs with the page cache and profiling off and jobs run
+inline, whatever the environment sets, and with the deferred load guard
+on. Tests that cover the page cache, profiling or the job queue turn them
+on with override_settings.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+GUARD_MIDDLEWARE = 'diy_blog.middleware.DeferredLoadGuardMiddleware'
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # lets tests turn replica reads on with override_settings(DATABASE_REPLICAS=['replica'])
+        settings.DATABASES.setdefault('replica', dict(settings.DATABASES['default'], TEST={'MIRROR': 'default'}))
+        middleware = list(settings.MIDDLEWARE)
+        if GUARD_MIDDLEWARE not in middleware:
+            # every view test doubles as a check that templates stay within only()
+            middleware.append(GUARD_MIDDLEWARE)
+        self.test_settings = override_settings(
+            PAGE_CACHE_TIMEOUT=0, PROFILING_SAMPLE_RATE=0, JOBS_EAGER=True,
+            DEFERRED_LOAD_GUARD=True, MIDDLEWARE=middleware,
+        )
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,11 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 urlpatterns = [
     path('', include('pages.urls', namespace='pages')),
     path('blog/', include('blog.urls', namespace='blog')),
     path('dashboard/', include('dashboard.urls', namespace='dashboard')),
     path('users/', include('users.urls')),
     path('accounts/', include('allauth.urls')),
+    path('admin/db-metrics/', views.database_metrics, name='db_metrics'),
+    path('admin/metrics/', views.request_metrics, name='request_metrics'),
+    path('metrics/', views.prometheus_metrics, name='prometheus_metrics'),
     path('admin/', admin.site.urls),
 ]
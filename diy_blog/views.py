@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from . import profiling
+from .db import pool
+
+
+@staff_member_required
+def database_metrics(request):
+    """Connection reuse counters of this worker process."""
+    pools = {alias: len(connections[alias].pool) for alias in connections
+             if getattr(connections[alias], 'pool', None) is not None}
+    return JsonResponse({'connections': pool.metrics(), 'idle_pooled': pools})
+
+
+@staff_member_required
+def request_metrics(request):
+    """Request profile histograms of this worker process, per URL name."""
+    return JsonResponse({
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'views': profiling.snapshot(),
+        'connections': pool.metrics(),
+    })
+
+
+@never_cache
+def prometheus_metrics(request):
+    """The same histograms for a Prometheus scrape, by METRICS_TOKEN or a staff session."""
+    token = request.META.get('HTTP_AUTHORIZATION', '').partition('Bearer ')[2]
+    allowed = (request.user.is_active and request.user.is_staff) or (
+        settings.METRICS_TOKEN and constant_time_compare(token, settings.METRICS_TOKEN))
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(profiling.prometheus(pool.metrics()),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from . import queue
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'args', 'status', 'attempts', 'run_at', 'claimed_by')
+    list_filter = ('status', 'name')
+    actions = ['retry']
+
+    def retry(self, request, queryset):
+        for job in queryset.filter(status=Job.FAILED):
+            queue.retry(job)
+    retry.short_description = 'Run the selected failed jobs again'
+
+admin.site.register(Job, JobAdmin)
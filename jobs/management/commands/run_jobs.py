@@ -0,0 +1,43 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs until stopped, SIGTERM lets the current batch finish.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=1, help='Seconds to wait when no job is due.')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as no job is due.')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        done = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            jobs = queue.claim(worker, options['batch_size'])
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            for job in jobs:
+                if queue.run(job):
+                    done += 1
+                else:
+                    failed += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{done} jobs done, {failed} failed')
+        self.stdout.write(self.style.SUCCESS(f'{done} jobs done, {failed} failed.'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
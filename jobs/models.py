@@ -0,0 +1,42 @@
+import json
+
+from django.db import models
+from django.db.models import Q
+
+
+class Job(models.Model):
+    """
+    One call of a function, run by the run_jobs worker. Jobs are deleted
+    once they succeed, so the table holds only what is waiting, running
+    or failed for good.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed'))
+
+    # dotted path of the function
+    name = models.CharField(max_length=200)
+    args = models.TextField(default='[]')
+    # a job is not queued twice under the same key while it waits to run
+    key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_at = models.DateTimeField()
+    claimed_by = models.CharField(max_length=100, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'], name='jobs_job_status_run_at_idx')]
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=Q(status='queued'), name='jobs_job_queued_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.name}({self.args[1:-1]})'
+
+    def get_args(self):
+        return json.loads(self.args)
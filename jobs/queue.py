@@ -0,0 +1,121 @@
+"""
+A small job queue kept in the database.
+
+``enqueue`` adds a row to jobs_job in the caller's transaction, so a job
+exists exactly when the write that asked for it was committed. Workers
+(``manage.py run_jobs``) claim a batch of due jobs at a time, run them and
+delete the ones that succeed. A job that raises is run again later, each
+wait twice as long as the one before, until it has used up its attempts.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the database
+has it, so workers never wait on each other's rows. SQLite has no row
+locks but only lets one connection write at a time, there the
+conditional update on the job status is what makes a claim.
+
+With JOBS_EAGER on, as in development and tests, jobs run right away in
+the caller instead.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _name(func):
+    return func if isinstance(func, str) else f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, key=None, delay=0, max_attempts=None):
+    """
+    Run ``func(*args)`` in a worker. ``func`` is a module-level function
+    or its dotted path, ``args`` must be JSON serializable. While a job
+    with the same ``key`` is waiting, no other is queued.
+    """
+    name = _name(func)
+    if settings.JOBS_EAGER:
+        import_string(name)(*args)
+        return None
+    job = Job(
+        name=name, args=json.dumps(args), key=key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic(using=router.db_for_write(Job)):
+            job.save()
+    except IntegrityError:
+        # the waiting job reads the current rows when it runs, one is enough
+        return None
+    return job
+
+
+def backoff(attempts):
+    """Seconds to wait after the ``attempts``th failed attempt."""
+    return min(settings.JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.JOBS_MAX_BACKOFF_SECONDS)
+
+
+def claim(worker, batch_size=10):
+    """Mark up to ``batch_size`` due jobs as running for ``worker`` and return them."""
+    now = timezone.now()
+    # jobs whose worker died while running them are due again
+    due = (Q(status=Job.QUEUED, run_at__lte=now)
+           | Q(status=Job.RUNNING, claimed_at__lt=now - timedelta(seconds=settings.JOBS_LEASE_SECONDS)))
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    using = router.db_for_write(Job)
+    with transaction.atomic(using=using):
+        jobs = Job.objects.using(using).filter(due).order_by('run_at', 'id')
+        if connections[using].features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        ids = list(jobs.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        Job.objects.using(using).filter(due, id__in=ids).update(
+            status=Job.RUNNING, claimed_by=token, claimed_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.using(using).filter(claimed_by=token, status=Job.RUNNING).order_by('run_at', 'id'))
+
+
+def run(job):
+    """Run one claimed job, then delete it or schedule its next attempt. True if it succeeded."""
+    try:
+        func = import_string(job.name)
+        with transaction.atomic():
+            func(*job.get_args())
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s failed for good after %s attempts', job, job.attempts)
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=error)
+        else:
+            logger.warning('Job %s failed, attempt %s of %s', job, job.attempts, job.max_attempts)
+            _requeue(job, timezone.now() + timedelta(seconds=backoff(job.attempts)), last_error=error)
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def retry(job):
+    """Queue a failed job again with all its attempts."""
+    _requeue(job, timezone.now(), attempts=0)
+
+
+def _requeue(job, run_at, **fields):
+    try:
+        with transaction.atomic(using=router.db_for_write(Job)):
+            Job.objects.filter(pk=job.pk).update(status=Job.QUEUED, run_at=run_at, claimed_by='', **fields)
+    except IntegrityError:
+        # a job with the same key was queued meanwhile and will do the work
+        Job.objects.filter(pk=job.pk).delete()
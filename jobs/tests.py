@@ -0,0 +1,100 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog.models import Blog, SearchEntry
+from jobs import queue
+from jobs.models import Job
+
+calls = []
+
+
+def record(*args):
+    calls.append(args)
+
+
+def fail():
+    raise ValueError('try again')
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_BACKOFF_SECONDS=10, JOBS_LEASE_SECONDS=60)
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_runs_right_away(self):
+        with self.settings(JOBS_EAGER=True):
+            self.assertIsNone(queue.enqueue(record, 1, 'a'))
+        self.assertEqual(calls, [(1, 'a')])
+        self.assertFalse(Job.objects.exists())
+
+    def test_key_queues_one_job_until_it_runs(self):
+        job = queue.enqueue('jobs.tests.record', 1, key='one')
+        self.assertIsNone(queue.enqueue(record, 1, key='one'))
+        self.assertEqual(Job.objects.count(), 1)
+        # once running it may have read the rows already, so queue another
+        queue.claim('worker')
+        self.assertIsNotNone(queue.enqueue(record, 1, key='one'))
+        self.assertEqual(Job.objects.filter(key='one').count(), 2)
+        self.assertTrue(queue.run(Job.objects.get(pk=job.pk)))
+        self.assertEqual(calls, [(1,)])
+
+    def test_claims_due_jobs_in_batches(self):
+        first, second, third = (queue.enqueue(record, n) for n in range(3))
+        queue.enqueue(record, 3, delay=60)
+        self.assertEqual(queue.claim('a', batch_size=2), [first, second])
+        self.assertEqual(queue.claim('b', batch_size=2), [third])
+        self.assertEqual(queue.claim('c'), [])
+        self.assertEqual(Job.objects.get(pk=first.pk).attempts, 1)
+
+    def test_jobs_of_a_lost_worker_are_claimed_again(self):
+        job = queue.enqueue(record)
+        queue.claim('lost')
+        self.assertEqual(queue.claim('other'), [])
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(seconds=61))
+        [job] = queue.claim('other')
+        self.assertEqual(job.attempts, 2)
+
+    def test_retries_with_backoff_then_fails(self):
+        job = queue.enqueue(fail)
+        for attempt, wait in ((1, 10), (2, 20)):
+            [job] = queue.claim('worker')
+            with self.assertLogs('jobs.queue', 'WARNING'):
+                self.assertFalse(queue.run(job))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, attempt))
+            self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), wait, delta=2)
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+        [job] = queue.claim('worker')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(queue.run(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('ValueError: try again', job.last_error)
+
+        queue.retry(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 0))
+
+    def test_backoff_is_capped(self):
+        with self.settings(JOBS_MAX_BACKOFF_SECONDS=60):
+            self.assertEqual([queue.backoff(n) for n in range(1, 6)], [10, 20, 40, 60, 60])
+
+
+@override_settings(JOBS_EAGER=False)
+class RunJobsCommandTest(TestCase):
+    def test_indexes_a_saved_post(self):
+        blogger = get_user_model().objects.create_user(username='blogger', password='12345')
+        blog = Blog.objects.create(blogger=blogger, title='Sanding a table', content='Start coarse.')
+        self.assertFalse(SearchEntry.objects.filter(blog=blog).exists())
+
+        out = io.StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertIn('1 jobs done, 0 failed', out.getvalue())
+        self.assertTrue(SearchEntry.objects.filter(blog=blog, term='sanding').exists())
+        self.assertFalse(Job.objects.exists())
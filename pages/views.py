@@ -1,4 +1,8 @@
 from django.views.generic import TemplateView
 
-class HomePageView(TemplateView):
-    template_name = 'pages/index.html'
\ No newline at end of file
+from blog.cache import AnonymousPageCacheMixin
+
+
+class HomePageView(AnonymousPageCacheMixin, TemplateView):
+    template_name = 'pages/index.html'
+    cache_tags = ['home']
\ No newline at end of file
@@ -10,6 +10,8 @@ class CustomUserAdmin(UserAdmin):
     model = CustomUser
     add_form = CustomUserCreationForm
     form = CustomUserChangeForm
+    list_display = UserAdmin.list_display + ('is_blogger',)
+    list_filter = UserAdmin.list_filter + ('is_blogger',)
 
     fieldsets = (
         (('User'), {'fields': ('username', 'email', 'bio')}),
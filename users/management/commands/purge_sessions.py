@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired rows from django_session a batch at a time, so the table '
+        'is never locked for long. Only the db and cached_db stores keep rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        if not settings.SESSION_ENGINE.endswith(('.db', '.cached_db')):
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no session rows, nothing to purge.')
+            return
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        purged = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            purged += Session.objects.filter(session_key__in=keys).delete()[0]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{purged} sessions purged')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired sessions.'))
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:11
+
+from django.db import migrations, models
+from django.db.models import Q
+import users.models
+
+
+def backfill_is_blogger(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Permission = apps.get_model('auth', 'Permission')
+    bloggers = Q(is_superuser=True)
+    permission = Permission.objects.filter(content_type__app_label='blog', codename='blogger').first()
+    if permission is not None:
+        bloggers |= Q(user_permissions=permission) | Q(groups__permissions=permission)
+    CustomUser.objects.filter(pk__in=CustomUser.objects.filter(bloggers).values('pk')).update(is_blogger=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20190824_1255'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', users.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='is_blogger',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_is_blogger, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,125 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save
+from django.contrib.auth.models import AbstractUser, Group, Permission, UserManager
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from diy_blog.guards import DeferredLoadGuardMixin
 
-class CustomUser(AbstractUser):
+# app label and codename of the permission that makes a user a blogger
+BLOGGER_PERMISSION = ('blog', 'blogger')
+
+_blogger_permission_id = None
+
+
+def blogger_permission_id():
+    """
+    Return the primary key of the blogger permission. It is looked up once
+    per process and forgotten whenever a Permission is saved or deleted.
+    """
+    global _blogger_permission_id
+    if _blogger_permission_id is None:
+        app_label, codename = BLOGGER_PERMISSION
+        _blogger_permission_id = (Permission.objects
+                                  .filter(content_type__app_label=app_label, codename=codename)
+                                  .values_list('pk', flat=True).first())
+    return _blogger_permission_id
+
+
+def has_blogger_permission():
+    """Q matching users that are superusers or hold the blogger permission."""
+    condition = Q(is_superuser=True)
+    permission_id = blogger_permission_id()
+    if permission_id is not None:
+        condition |= Q(user_permissions=permission_id) | Q(groups__permissions=permission_id)
+    return condition
+
+
+class CustomUserManager(UserManager):
+    def bloggers(self):
+        return self.filter(is_blogger=True)
+
+    def sync_bloggers(self, **filters):
+        """Recompute is_blogger for the users matching ``filters`` (everyone by default)."""
+        users = self.filter(**filters)
+        bloggers = self.filter(has_blogger_permission()).values('pk')
+        users.filter(pk__in=bloggers, is_blogger=False).update(is_blogger=True)
+        users.filter(is_blogger=True).exclude(pk__in=bloggers).update(is_blogger=False)
+
+
+class CustomUser(DeferredLoadGuardMixin, AbstractUser):
     bio = models.TextField(blank=True, null=True)
+    # denormalized from the blogger permission, kept current by the receivers below
+    is_blogger = models.BooleanField(default=False, db_index=True, editable=False)
+
+    objects = CustomUserManager()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # remember the username as loaded so a rename can purge the pages showing it
+        self._loaded_username = self.__dict__.get('username') if self.pk else None
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_username = self.username
+
+
+def refresh_is_blogger(user):
+    """Recompute is_blogger for one saved user and update the instance too."""
+    user.is_blogger = CustomUser.objects.filter(has_blogger_permission(), pk=user.pk).exists()
+    CustomUser.objects.filter(pk=user.pk).update(is_blogger=user.is_blogger)
+
+
+@receiver(post_save, sender=Permission)
+def permission_saved(sender, **kwargs):
+    global _blogger_permission_id
+    _blogger_permission_id = None
+
+
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    global _blogger_permission_id
+    _blogger_permission_id = None
+    if (instance.content_type.app_label, instance.codename) == BLOGGER_PERMISSION:
+        CustomUser.objects.sync_bloggers()
+
+
+@receiver(pre_save, sender=CustomUser)
+def set_is_blogger(sender, instance, update_fields=None, raw=False, **kwargs):
+    # the stored flag may be newer than this instance, so never write it back stale
+    if raw or update_fields is not None:
+        return
+    instance.is_blogger = instance.is_superuser or (
+        instance.pk is not None and CustomUser.objects.filter(has_blogger_permission(), pk=instance.pk).exists())
+
+
+@receiver(post_save, sender=CustomUser)
+def superuser_changed(sender, instance, update_fields=None, raw=False, **kwargs):
+    if not raw and update_fields is not None and 'is_superuser' in update_fields:
+        refresh_is_blogger(instance)
+
+
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        refresh_is_blogger(instance)
+    elif pk_set is None:
+        # a reverse clear() does not say which users were affected
+        CustomUser.objects.sync_bloggers()
+    else:
+        CustomUser.objects.sync_bloggers(pk__in=pk_set)
+
 
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        CustomUser.objects.sync_bloggers(groups=instance)
+    elif pk_set is None:
+        CustomUser.objects.sync_bloggers()
+    else:
+        CustomUser.objects.sync_bloggers(groups__in=pk_set)
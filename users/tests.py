@@ -1,6 +1,20 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 from blog.tests.mixins import TestDataMixin
 
+from diy_blog.checks import session_store_check
+from users import models as user_models
+
+
 class UserTest(TestDataMixin, TestCase):
     def test_blogger_bio(self):
         blogger = self.blog1.blogger
@@ -8,4 +22,108 @@ class UserTest(TestDataMixin, TestCase):
     
     def test_non_blogger_bio(self):
         user = self.commenter
-        self.assertIsNone(user.bio)
\ No newline at end of file
+        self.assertIsNone(user.bio)
+
+
+class IsBloggerTest(TestDataMixin, TestCase):
+    def setUp(self):
+        self.permission = Permission.objects.get(codename='blogger', content_type__app_label='blog')
+
+    def is_blogger(self, user):
+        return get_user_model().objects.get(pk=user.pk).is_blogger
+
+    def test_fixture_flags(self):
+        bloggers = set(get_user_model().objects.bloggers())
+        self.assertEqual(bloggers, {self.superuser, self.user, self.user1})
+        self.assertTrue(self.user.is_blogger)
+        self.assertFalse(self.is_blogger(self.commenter))
+
+    def test_user_permission_add_and_remove(self):
+        self.commenter.user_permissions.add(self.permission)
+        self.assertTrue(self.commenter.is_blogger)
+        self.assertTrue(self.is_blogger(self.commenter))
+        self.commenter.user_permissions.remove(self.permission)
+        self.assertFalse(self.is_blogger(self.commenter))
+
+    def test_reverse_permission_add_and_clear(self):
+        self.permission.user_set.add(self.commenter)
+        self.assertTrue(self.is_blogger(self.commenter))
+        self.permission.user_set.clear()
+        self.assertFalse(self.is_blogger(self.commenter))
+        self.assertFalse(self.is_blogger(self.user))
+        self.assertTrue(self.is_blogger(self.superuser))
+
+    def test_group_membership_and_group_permissions(self):
+        group = Group.objects.create(name='writers')
+        self.commenter.groups.add(group)
+        self.assertFalse(self.is_blogger(self.commenter))
+        group.permissions.add(self.permission)
+        self.assertTrue(self.is_blogger(self.commenter))
+        self.commenter.groups.remove(group)
+        self.assertFalse(self.is_blogger(self.commenter))
+
+    def test_stale_instance_save_keeps_flag(self):
+        stale = get_user_model().objects.get(pk=self.commenter.pk)
+        self.permission.user_set.add(self.commenter)
+        stale.bio = 'now a blogger'
+        stale.save()
+        self.assertTrue(self.is_blogger(self.commenter))
+
+    def test_superuser_is_blogger(self):
+        self.commenter.is_superuser = True
+        self.commenter.save()
+        self.assertTrue(self.is_blogger(self.commenter))
+
+    def test_permission_id_cached_until_permissions_change(self):
+        user_models.blogger_permission_id()
+        with self.assertNumQueries(0):
+            self.assertEqual(user_models.blogger_permission_id(), self.permission.pk)
+        Permission.objects.create(codename='other', name='other', content_type=self.permission.content_type)
+        with self.assertNumQueries(1):
+            user_models.blogger_permission_id()
+
+
+class PurgeSessionsTest(TestCase):
+    def make_session(self, expire_date):
+        session = SessionStore()
+        session['n'] = 1
+        session.create()
+        Session.objects.filter(session_key=session.session_key).update(expire_date=expire_date)
+        return session.session_key
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_purges_only_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for _ in range(5):
+            self.make_session(now - timedelta(days=1))
+        live = self.make_session(now + timedelta(days=1))
+        out = io.StringIO()
+        call_command('purge_sessions', '--batch-size=2', stdout=out)
+        self.assertIn('Purged 5 expired sessions', out.getvalue())
+        self.assertQuerysetEqual(Session.objects.all(), [live], transform=lambda session: session.session_key)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_nothing_to_purge_without_session_rows(self):
+        self.make_session(timezone.now() - timedelta(days=1))
+        out = io.StringIO()
+        call_command('purge_sessions', stdout=out)
+        self.assertIn('nothing to purge', out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class SessionStoreCheckTest(SimpleTestCase):
+    local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    shared = {'default': {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': '127.0.0.1:11211'}}
+
+    def errors(self, store, caches):
+        with self.settings(SESSION_ENGINE=settings.SESSION_ENGINES[store], CACHES=caches):
+            return [error.id for error in session_store_check(None)]
+
+    def test_cached_stores_need_a_shared_cache(self):
+        self.assertEqual(self.errors('cached_db', self.local), ['diy_blog.E001'])
+        self.assertEqual(self.errors('cache', self.local), ['diy_blog.E001'])
+        self.assertEqual(self.errors('cached_db', self.shared), [])
+
+    def test_other_stores_need_no_cache(self):
+        self.assertEqual(self.errors('db', self.local), [])
+        self.assertEqual(self.errors('signed_cookies', self.local), [])